@@ -1,10 +1,10 @@
 import os
 import streamlit as st
 import json
-from utils.profile_loader import load_user_profile
+from utils.profile_store import USER_DIR, get_profile_store
 
-USER_DIR = "users"
 os.makedirs(USER_DIR, exist_ok=True)
+store = get_profile_store()
 
 st.set_page_config(page_title="Select or Edit Profile", layout="wide")
 
@@ -12,11 +12,7 @@ st.set_page_config(page_title="Select or Edit Profile", layout="wide")
 if "active_profile" not in st.session_state:
     st.title("Select User Profile")
 
-    profile_files = sorted([
-        f for f in os.listdir(USER_DIR)
-        if f.endswith(".json") and os.path.isfile(os.path.join(USER_DIR, f)) and f != "active_profile.json"
-    ])
-    profile_names = [os.path.splitext(f)[0] for f in profile_files]
+    profile_names = store.list_profiles()
 
     if profile_names:
         st.subheader("Choose a profile:")
@@ -25,8 +21,7 @@ if "active_profile" not in st.session_state:
             with cols[i % 3]:
                 if st.button(f"{name.title()}", key=f"profile_{name}"):
                     st.session_state["active_profile"] = name
-                    with open(os.path.join(USER_DIR, "active_profile.json"), "w") as f:
-                        json.dump({"active_profile": name}, f)
+                    store.set_active_profile(name)
                     st.rerun()
     else:
         st.warning("No profiles found. Upload or create one below.")
@@ -38,10 +33,8 @@ if "active_profile" not in st.session_state:
         try:
             content = json.load(upload)
             new_name = os.path.splitext(upload.name)[0]
-            with open(os.path.join(USER_DIR, f"{new_name}.json"), "w") as f:
-                json.dump(content, f, indent=2)
-            with open(os.path.join(USER_DIR, "active_profile.json"), "w") as f:
-                json.dump({"active_profile": new_name}, f)
+            store.save_profile(new_name, content)
+            store.set_active_profile(new_name)
             st.success(f"Uploaded and saved profile: {new_name}")
             st.session_state["active_profile"] = new_name
             st.rerun()
@@ -71,10 +64,8 @@ if "active_profile" not in st.session_state:
                     "github": github,
                     "portfolio": portfolio
                 }
-                with open(os.path.join(USER_DIR, f"{profile_id}.json"), "w") as f:
-                    json.dump(profile_data, f, indent=2)
-                with open(os.path.join(USER_DIR, "active_profile.json"), "w") as f:
-                    json.dump({"active_profile": profile_id}, f)
+                store.save_profile(profile_id, profile_data)
+                store.set_active_profile(profile_id)
                 st.success(f"Profile '{profile_id}' created!")
                 st.session_state["active_profile"] = profile_id
                 st.rerun()
@@ -102,8 +93,7 @@ else:
     st.divider()
     st.subheader("🧾 Edit Profile Information")
 
-    profile_path = os.path.join(USER_DIR, f"{profile_name}.json")
-    existing = load_user_profile(profile_path)
+    existing = store.get_profile(profile_name)
 
     with st.form("edit_profile_form"):
         name = st.text_input("Full Name", existing.get("name", ""))
@@ -124,26 +114,27 @@ else:
                 "github": github,
                 "portfolio": portfolio
             }
-            with open(profile_path, "w") as f:
-                json.dump(profile_data, f, indent=2)
+            store.save_profile(profile_name, profile_data)
             st.success("Profile updated successfully!")
             st.rerun()
 
     st.divider()
     st.subheader("📁 Resume Tools")
-    master_resume_path = os.path.join(USER_DIR, f"{profile_name}_master_resume.csv")
-    has_master = os.path.exists(master_resume_path)
+    master_resume_bytes = store.get_master_resume_bytes(profile_name)
 
-    if has_master:
+    if master_resume_bytes is not None:
         st.success("Master Resume is saved.")
-        with open(master_resume_path, "rb") as f:
-            st.download_button("⬇️ Download Master Resume", f, file_name=f"{profile_name}_master_resume.csv", mime="text/csv")
+        st.download_button(
+            "⬇️ Download Master Resume",
+            master_resume_bytes,
+            file_name=f"{profile_name}_master_resume.csv",
+            mime="text/csv"
+        )
     else:
         st.warning("No Master Resume uploaded yet.")
 
     uploaded_resume = st.file_uploader("Upload Master Resume (CSV)", type=["csv"])
     if uploaded_resume:
-        with open(master_resume_path, "wb") as f:
-            f.write(uploaded_resume.getbuffer())
+        store.save_master_resume(profile_name, uploaded_resume.getvalue())
         st.success("Master Resume uploaded.")
         st.rerun()
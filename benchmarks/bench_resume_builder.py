@@ -0,0 +1,67 @@
+# benchmarks/bench_resume_builder.py
+#
+# Cost of the lookups one Resume Builder rerun makes: every personal-info field plus the grouped
+# experience, certification, education and project blocks. Compares the DataFrame boolean-mask
+# scans the page used to run on every rerun with reads from a prebuilt Resume index.
+# Run from the repo root: python -m benchmarks.bench_resume_builder
+
+import random
+import timeit
+import pandas as pd
+from utils.resume_model import Resume
+
+PERSONAL_FIELDS = ("name", "location", "email", "phone", "linkedin", "github", "portfolio", "target_roles")
+GROUPED_SECTIONS = ("professional_experience", "certifications", "education", "projects")
+
+def df_group_blocks(df, section):
+    grouped = []
+    for sub in df[df.section == section].subsection.unique():
+        merged = "\n".join(df[(df.section == section) & (df.subsection == sub)].content.tolist())
+        lines = [line for line in merged.split("\n") if line.strip()]
+        if lines:
+            grouped.append((sub, lines))
+    return grouped
+
+def df_get_val(df, sec, sub):
+    match = df[(df.section == sec) & (df.subsection == sub)]
+    return match.content.values[0] if not match.empty else ""
+
+def master_rows(n_blocks, rng):
+    rows = [{"section": "personal_info", "subsection": f, "content": f"{f} value"} for f in PERSONAL_FIELDS]
+    rows.append({"section": "professional_summary", "subsection": "summary", "content": "Summary"})
+    for i in range(n_blocks - len(rows)):
+        section = GROUPED_SECTIONS[i % len(GROUPED_SECTIONS)]
+        bullets = "\n".join(f"• bullet {j}" for j in range(rng.randint(1, 5)))
+        rows.append({"section": section, "subsection": f"{section}_{i // len(GROUPED_SECTIONS)}", "content": f"**Header {i}**\n{bullets}"})
+    rng.shuffle(rows)
+    return rows
+
+def rerun_with_dataframe(df):
+    values = [df_get_val(df, "personal_info", f) for f in PERSONAL_FIELDS]
+    values.append(df_get_val(df, "professional_summary", "summary"))
+    return values, [df_group_blocks(df, s) for s in GROUPED_SECTIONS]
+
+def rerun_with_index(resume):
+    values = [resume.get("personal_info", f) for f in PERSONAL_FIELDS]
+    values.append(resume.get("professional_summary", "summary"))
+    return values, [resume.grouped(s) for s in GROUPED_SECTIONS]
+
+def ms_per_call(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e3
+
+def main():
+    rng = random.Random(0)
+    print(f"{'master blocks':>14}{'DataFrame ms':>15}{'index ms':>12}{'speedup':>10}")
+    for n_blocks in (50, 200, 800):
+        rows = master_rows(n_blocks, rng)
+        df = pd.DataFrame(rows)
+        resume = Resume.from_records(rows)
+        assert rerun_with_dataframe(df) == rerun_with_index(resume)
+        df_ms = ms_per_call(lambda: rerun_with_dataframe(df), 5)
+        index_ms = ms_per_call(lambda: rerun_with_index(resume), 50)
+        print(f"{n_blocks:>14}{df_ms:>15.2f}{index_ms:>12.3f}{df_ms / index_ms:>9.0f}x")
+    build_ms = ms_per_call(lambda: Resume.from_records(rows), 20)
+    print(f"Building the index for {len(rows)} blocks (once per upload): {build_ms:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_resume_rewriter.py
+#
+# Per-call cost of normalize_ollama_blocks and enforce_all_guidelines.
+# Run from the repo root: python -m benchmarks.bench_resume_rewriter
+
+import random
+import timeit
+from utils.resume_rewriter import enforce_all_guidelines, normalize_ollama_blocks
+
+WORDS = "built led designed automated sql python dashboards pipelines forecasting stakeholders reporting etl".split()
+
+def sentence(rng, n=10):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+def master_resume(rng, n_blocks):
+    rows = [{"section": "personal_info", "subsection": sub, "content": sentence(rng, 2)}
+            for sub in ("name", "email", "phone", "location", "linkedin", "target_roles")]
+    rows.append({"section": "professional_summary", "subsection": "summary", "content": sentence(rng, 40)})
+    sections = ("professional_experience", "projects", "certifications", "education", "technical_skills")
+    for i in range(n_blocks - len(rows)):
+        section = sections[i % len(sections)]
+        bullets = "\n".join(f"• {sentence(rng)}" for _ in range(rng.randint(1, 6)))
+        rows.append({"section": section, "subsection": f"{section}_{i}", "content": f"**{sentence(rng, 4)}**\n{bullets}"})
+    return rows
+
+def llm_output(rng):
+    # The nested JSON shapes llama3 tends to produce
+    return [
+        {"section": "professional_summary", "subsection": "summary", "content": sentence(rng, 40)},
+        {"section": "technical_skills", "subsection": "programming_languages", "content": [sentence(rng, 1) for _ in range(8)]},
+        {"section": "experience", "subsection": [
+            {"title": sentence(rng, 2), "company": sentence(rng, 1), "dates": ["2021", "2024"],
+             "responsibilities": [sentence(rng) for _ in range(4)]}
+            for _ in range(3)
+        ]},
+        {"section": "projects", "content": [{"title": sentence(rng, 3), "description": [sentence(rng)]} for _ in range(4)]},
+        {"section": "certification", "content": {"name": sentence(rng, 3), "date": "2023"}},
+        {"section": "education", "subsection": {"degree": "BSc", "school": sentence(rng, 2), "date": "2019"}},
+    ]
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+def main():
+    rng = random.Random(0)
+    print(f"{'case':<44}{'us/call':>12}")
+    for n_blocks in (50, 200, 800):
+        master = master_resume(rng, n_blocks)
+        normalized = normalize_ollama_blocks(llm_output(rng))
+        us = per_call_us(lambda: enforce_all_guidelines(normalized, master), 200)
+        print(f"{f'enforce_all_guidelines, {n_blocks}-block master':<44}{us:>12.1f}")
+
+    outputs = [llm_output(rng) for _ in range(500)]
+    master = master_resume(rng, 200)
+    us = per_call_us(lambda: [normalize_ollama_blocks(o) for o in outputs], 1) / len(outputs)
+    print(f"{'normalize_ollama_blocks, batch of 500':<44}{us:>12.1f}")
+    us = per_call_us(lambda: [enforce_all_guidelines(normalize_ollama_blocks(o), master) for o in outputs], 1) / len(outputs)
+    print(f"{'normalize + enforce, batch of 500 vs 200':<44}{us:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,40 @@
 # mcp_server/server.py
 
-from fastapi import FastAPI, Request
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 
-from mcp_server.tools.fetch_job_postings import fetch_job_postings
+from mcp_server.tools.fetch_job_postings import (
+    close_async_client,
+    fetch_job_postings_async,
+    fetch_job_postings_batch,
+    job_cache,
+    stream_job_postings,
+)
 from mcp_server.tools.resume_rewriter import full_resume_rewriter
+from mcp_server.task_queue import QueueFull, TaskQueue
+from utils.llm_backends import OLLAMA_URLS, llm_stats
+
+# Rewrites run in the background; match the worker count to how many generations the Ollama servers run at once
+rewrite_queue = TaskQueue(
+    full_resume_rewriter,
+    workers=int(os.getenv("REWRITE_WORKERS", int(os.getenv("OLLAMA_NUM_PARALLEL", "1")) * len(OLLAMA_URLS))),
+    max_pending=int(os.getenv("REWRITE_QUEUE_LIMIT", "20")),
+)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    await rewrite_queue.start()
+    yield
+    await rewrite_queue.stop()
+    await close_async_client()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,9 +46,78 @@ app.add_middleware(
 @app.post("/tools/fetch_job_postings/invoke")
 async def invoke_job_postings(request: Request):
     data = await request.json()
-    return fetch_job_postings(**data)
+    return await fetch_job_postings_async(**data)
+
+@app.post("/tools/fetch_job_postings/batch_invoke")
+async def batch_invoke_job_postings(request: Request):
+    data = await request.json()
+    queries = data.get("queries", []) if isinstance(data, dict) else data
+    try:
+        return await fetch_job_postings_batch(queries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/tools/fetch_job_postings/stream")
+async def stream_job_postings_endpoint(request: Request):
+    data = await request.json()
+
+    async def lines():
+        async for item in stream_job_postings(**data):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/tools/fetch_job_postings/cache_stats")
+async def job_postings_cache_stats():
+    return job_cache.stats()
+
+@app.get("/tools/full_resume_rewriter/llm_stats")
+async def resume_rewriter_llm_stats():
+    return llm_stats()
 
 @app.post("/tools/full_resume_rewriter/invoke")
 async def invoke_resume_rewriter(request: Request):
     data = await request.json()
-    return full_resume_rewriter(**data)
\ No newline at end of file
+    # The LLM call blocks for a long time; run it in the threadpool so job searches keep flowing
+    return await run_in_threadpool(full_resume_rewriter, **data)
+
+@app.post("/tools/full_resume_rewriter/submit", status_code=202)
+async def submit_resume_rewriter(request: Request):
+    data = await request.json()
+    try:
+        return rewrite_queue.submit(data)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+@app.get("/tasks/stats")
+async def task_stats():
+    return rewrite_queue.stats()
+
+@app.get("/tasks/{task_id}")
+async def get_task(task_id: str):
+    task = rewrite_queue.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Unknown task id")
+    return task
+
+@app.get("/tasks/{task_id}/events")
+async def task_events(task_id: str):
+    if rewrite_queue.get(task_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown task id")
+
+    # Server-sent events: one message per status change, ending once the task finishes
+    async def events():
+        last_status = None
+        while True:
+            task = rewrite_queue.get(task_id)
+            if task is None:
+                return
+            if task["status"] != last_status:
+                last_status = task["status"]
+                yield f"data: {json.dumps(task)}\n\n"
+            if last_status in ("done", "failed"):
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
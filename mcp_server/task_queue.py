@@ -0,0 +1,102 @@
+# mcp_server/task_queue.py
+
+import asyncio
+import time
+import uuid
+from fastapi.concurrency import run_in_threadpool
+
+class QueueFull(Exception):
+    pass
+
+class TaskQueue:
+    # Runs a blocking handler(**payload) on a fixed number of workers. submit() returns a task id
+    # right away; get() reports queued/running/done/failed. Finished tasks are dropped after keep_finished
+    # seconds, checked at most once a minute as tasks finish and on get() and stats().
+    def __init__(self, handler, workers=1, max_pending=20, keep_finished=3600):
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.keep_finished = keep_finished
+        self.prune_interval = min(60, keep_finished)
+        self.tasks = {}
+        self._queue = None
+        self._workers = []
+        # The queue is FIFO, so a queued task's position is its submit number minus the tasks taken so far
+        self._submitted = 0
+        self._taken = 0
+        self._pruned = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, payload):
+        if self._queue is None:
+            raise RuntimeError("Task queue is not running")
+        task_id = uuid.uuid4().hex
+        task = {"task_id": task_id, "status": "queued", "submitted": time.time(), "result": None, "error": None}
+        try:
+            self._queue.put_nowait((task_id, payload))
+        except asyncio.QueueFull:
+            raise QueueFull(f"Too many queued tasks (limit {self.max_pending}); try again shortly")
+        self._submitted += 1
+        task["seq"] = self._submitted
+        self.tasks[task_id] = task
+        return self.get(task_id)
+
+    def get(self, task_id):
+        self._prune()
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        view = {k: v for k, v in task.items() if k != "seq"}
+        if task["status"] == "queued":
+            view["position"] = task["seq"] - self._taken
+        return view
+
+    def stats(self):
+        self._prune()
+        statuses = [t["status"] for t in self.tasks.values()]
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed"),
+        }
+
+    async def _work(self):
+        while True:
+            task_id, payload = await self._queue.get()
+            self._taken += 1
+            task = self.tasks.get(task_id)
+            try:
+                if task is None:
+                    continue
+                task.update(status="running", started=time.time())
+                try:
+                    task["result"] = await run_in_threadpool(self.handler, **payload)
+                    task["status"] = "done"
+                except Exception as e:
+                    task.update(status="failed", error=str(e) or type(e).__name__)
+                task["finished"] = time.time()
+                self._prune()
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        now = time.time()
+        if now - self._pruned < self.prune_interval:
+            return
+        self._pruned = now
+        cutoff = now - self.keep_finished
+        for task_id, task in list(self.tasks.items()):
+            if task["status"] in ("done", "failed") and task.get("finished", 0) < cutoff:
+                del self.tasks[task_id]
@@ -1,14 +1,70 @@
 # mcp_server/tools/fetch_job_postings.py
 
+import asyncio
+import math
+from collections import deque
+import httpx
+import json
 import requests
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+from utils.ttl_cache import TTLCache
+from utils.job_dedup import JobDeduplicator
+from mcp_server.tools.job_store import get_job_store
 
 load_dotenv()
 APP_ID = os.getenv("ADZUNA_APP_ID")
 APP_KEY = os.getenv("ADZUNA_APP_KEY")
 RAPIDAPI_KEY = os.getenv("RAPIDAPI_KEY")
+BATCH_MAX_WORKERS = int(os.getenv("JOB_BATCH_MAX_WORKERS", "8"))
+CONNECT_TIMEOUT = float(os.getenv("JOB_API_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("JOB_API_READ_TIMEOUT", "20"))
+
+JOB_CACHE_TTL = float(os.getenv("JOB_CACHE_TTL", "900"))
+JOB_CACHE_MAX_ENTRIES = int(os.getenv("JOB_CACHE_MAX_ENTRIES", "256"))
+JOB_CACHE_DIR = os.getenv("JOB_CACHE_DIR", "")
+
+JOB_PAGE_CONCURRENCY = int(os.getenv("JOB_PAGE_CONCURRENCY", "3"))
+JOB_MAX_PAGES = int(os.getenv("JOB_MAX_PAGES", "10"))
+
+ADZUNA_URL = "https://api.adzuna.com/v1/api/jobs/us/search/{page}"
+JSEARCH_URL = "https://jsearch.p.rapidapi.com/search"
+# Largest page each provider serves; bigger requests are paginated
+PAGE_SIZES = {"adzuna": 50, "jsearch": 10}
+JSEARCH_DATE_POSTED = {"Today": "today", "Past 3 days": "3days", "Past week": "week", "Past month": "month"}
+
+# Pooled keep-alive clients shared by every request: a sync session for scripts and
+# the Streamlit side, and an async client for the FastAPI event loop
+_session = requests.Session()
+_async_client = None
+
+# Repeated searches are served from here instead of spending provider quota
+job_cache = TTLCache(
+    max_entries=JOB_CACHE_MAX_ENTRIES,
+    ttl=JOB_CACHE_TTL,
+    path=os.path.join(JOB_CACHE_DIR, "job_postings.sqlite") if JOB_CACHE_DIR else None,
+)
+
+def job_cache_key(query, location, results_per_page, posted_within, source):
+    def norm(value):
+        return " ".join(str(value or "").split()).lower()
+    return json.dumps([norm(query), norm(location), int(results_per_page), norm(posted_within), norm(source)])
+
+def get_async_client():
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30),
+        )
+    return _async_client
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
 
 def is_recent(posted_str, filter_value):
     try:
@@ -42,60 +98,78 @@ def format_post_date(created_str):
             continue
     return f"Posted: {created_str}"
 
-def fetch_from_jsearch(query, location, results_per_page, posted_within):
-    if not RAPIDAPI_KEY:
-        return {"error": "Missing RAPIDAPI_KEY in .env"}
+def store_jobs(jobs, source):
+    # Every provider response is parsed exactly once and its jobs stored here. The write is a
+    # blocking SQLite commit, so the async paths run it in a worker thread via asyncio.to_thread.
+    try:
+        get_job_store().upsert_jobs(jobs, source)
+    except Exception as e:
+        print(f"Job store upsert failed: {e}")
+
+def search_local_jobs(query, location, results_per_page, posted_within):
+    try:
+        rows = get_job_store().search_jobs(query, location, posted_within, limit=results_per_page)
+    except Exception as e:
+        return {"error": f"Local job store unavailable: {e}"}
+    jobs = [
+        {
+            "title": row["title"],
+            "company": row["company"],
+            "location": row["location"],
+            "url": row["url"],
+            "posted": row["created"] or None,
+            "created": row["created"] or None,
+            "date_display": format_post_date(row["created"]) if row["created"] else "Date not available",
+            "description": row["description"],
+            "source": row["source"]
+        }
+        for row in rows
+    ]
+    return {"query": query, "location": location, "results": jobs}
 
-    url = "https://jsearch.p.rapidapi.com/search"
+def jsearch_request(query, location, page=1):
     params = {
         "query": f"{query} in {location}",
-        "page": "1",
+        "page": str(page),
         "num_pages": "1"
     }
     headers = {
         "X-RapidAPI-Key": RAPIDAPI_KEY,
         "X-RapidAPI-Host": "jsearch.p.rapidapi.com"
     }
+    return params, headers
 
-    try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        raw_results = data.get("data", [])
-        print(f"JSearch returned {len(raw_results)} raw jobs for '{query}'")
-
-        jobs = []
-        for job in raw_results:
-            created_str = job.get("job_posted_at_datetime_utc")
-            if is_recent(created_str, posted_within):
-                date_display = format_post_date(created_str) if created_str else "Date not available"
-                jobs.append({
-                    "title": job.get("job_title", "No Title"),
-                    "company": job.get("employer_name", "N/A"),
-                    "location": job.get("job_city", "N/A"),
-                    "url": job.get("job_apply_link", "#"),
-                    "posted": created_str,
-                    "created": created_str,
-                    "date_display": date_display,
-                    "description": job.get("job_description", "")
-                })
-
-        jobs.sort(key=lambda x: x.get("created") or "", reverse=True)
-        jobs = jobs[:results_per_page]
-
-        print(f"Filtered to {len(jobs)} jobs after date check and slicing")
-        return {"query": query, "location": location, "results": jobs}
+def parse_jsearch(data, query, location, posted_within):
+    # Every job that passes the date filter, newest first; callers store them, then slice
+    raw_results = data.get("data", [])
+    print(f"JSearch returned {len(raw_results)} raw jobs for '{query}'")
 
-    except Exception as e:
-        return {"error": str(e)}
+    jobs = []
+    for job in raw_results:
+        created_str = job.get("job_posted_at_datetime_utc")
+        if is_recent(created_str, posted_within):
+            date_display = format_post_date(created_str) if created_str else "Date not available"
+            jobs.append({
+                "title": job.get("job_title", "No Title"),
+                "company": job.get("employer_name", "N/A"),
+                "location": job.get("job_city", "N/A"),
+                "url": job.get("job_apply_link", "#"),
+                "posted": created_str,
+                "created": created_str,
+                "date_display": date_display,
+                "description": job.get("job_description", "")
+            })
 
-def fetch_from_adzuna(query, location, results_per_page, posted_within):
-    if not APP_ID or not APP_KEY:
-        return {"error": "Missing ADZUNA_APP_ID or ADZUNA_APP_KEY in .env"}
+    jobs.sort(key=lambda x: x.get("created") or "", reverse=True)
+    return {"query": query, "location": location, "results": jobs}
 
-    url = "https://api.adzuna.com/v1/api/jobs/us/search/1"
-    params = {
+def first_results(result, results_per_page):
+    result["results"] = result["results"][:results_per_page]
+    print(f"Filtered to {len(result['results'])} jobs after date check and slicing")
+    return result
+
+def adzuna_request(query, location, results_per_page):
+    return {
         "app_id": APP_ID,
         "app_key": APP_KEY,
         "results_per_page": results_per_page,
@@ -104,35 +178,264 @@ def fetch_from_adzuna(query, location, results_per_page, posted_within):
         "content-type": "application/json"
     }
 
+def parse_adzuna(data, query, location, posted_within):
+    jobs = []
+    for job in data.get("results", []):
+        created_str = job.get("created")
+        date_display = format_post_date(created_str) if created_str else "Date not available"
+        if is_recent(created_str, posted_within):
+            jobs.append({
+                "title": job.get("title", "No Title"),
+                "company": job.get("company", {}).get("display_name", "N/A"),
+                "location": job.get("location", {}).get("display_name", "N/A"),
+                "url": job.get("redirect_url", "#"),
+                "posted": created_str,
+                "created": created_str,
+                "date_display": date_display,
+                "description": job.get("description", "")
+            })
+
+    jobs.sort(key=lambda x: x.get("created") or "", reverse=True)
+    return {"query": query, "location": location, "results": jobs}
+
+def fetch_from_jsearch(query, location, results_per_page, posted_within):
+    if not RAPIDAPI_KEY:
+        return {"error": "Missing RAPIDAPI_KEY in .env"}
+
+    params, headers = jsearch_request(query, location)
     try:
-        response = requests.get(url, params=params)
+        response = _session.get(JSEARCH_URL, headers=headers, params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
         response.raise_for_status()
-        data = response.json()
+        result = parse_jsearch(response.json(), query, location, posted_within)
+        store_jobs(result["results"], "jsearch")
+        return first_results(result, results_per_page)
+    except Exception as e:
+        return {"error": str(e)}
 
-        jobs = []
-        for job in data.get("results", []):
-            created_str = job.get("created")
-            date_display = format_post_date(created_str) if created_str else "Date not available"
-            if is_recent(created_str, posted_within):
-                jobs.append({
-                    "title": job.get("title", "No Title"),
-                    "company": job.get("company", {}).get("display_name", "N/A"),
-                    "location": job.get("location", {}).get("display_name", "N/A"),
-                    "url": job.get("redirect_url", "#"),
-                    "posted": created_str,
-                    "created": created_str,
-                    "date_display": date_display,
-                    "description": job.get("description", "")
-                })
-
-        jobs.sort(key=lambda x: x.get("created") or "", reverse=True)
-        return {"query": query, "location": location, "results": jobs}
+def fetch_from_adzuna(query, location, results_per_page, posted_within):
+    if not APP_ID or not APP_KEY:
+        return {"error": "Missing ADZUNA_APP_ID or ADZUNA_APP_KEY in .env"}
 
+    params = adzuna_request(query, location, results_per_page)
+    try:
+        response = _session.get(ADZUNA_URL.format(page=1), params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        response.raise_for_status()
+        result = parse_adzuna(response.json(), query, location, posted_within)
+        store_jobs(result["results"], "adzuna")
+        return result
     except Exception as e:
         return {"error": str(e)}
 
+async def fetch_from_jsearch_async(query, location, results_per_page, posted_within):
+    if not RAPIDAPI_KEY:
+        return {"error": "Missing RAPIDAPI_KEY in .env"}
+
+    params, headers = jsearch_request(query, location)
+    try:
+        response = await get_async_client().get(JSEARCH_URL, headers=headers, params=params)
+        response.raise_for_status()
+        result = parse_jsearch(response.json(), query, location, posted_within)
+        await asyncio.to_thread(store_jobs, result["results"], "jsearch")
+        return first_results(result, results_per_page)
+    except Exception as e:
+        return {"error": str(e) or type(e).__name__}
+
+async def fetch_from_adzuna_async(query, location, results_per_page, posted_within):
+    if not APP_ID or not APP_KEY:
+        return {"error": "Missing ADZUNA_APP_ID or ADZUNA_APP_KEY in .env"}
+
+    params = adzuna_request(query, location, results_per_page)
+    try:
+        response = await get_async_client().get(ADZUNA_URL.format(page=1), params=params)
+        response.raise_for_status()
+        result = parse_adzuna(response.json(), query, location, posted_within)
+        await asyncio.to_thread(store_jobs, result["results"], "adzuna")
+        return result
+    except Exception as e:
+        return {"error": str(e) or type(e).__name__}
+
 def fetch_job_postings(query="data analyst", location="San Diego", results_per_page=10, posted_within="Any time", source="adzuna"):
+    if source == "local":
+        return search_local_jobs(query, location, results_per_page, posted_within)
+
+    key = job_cache_key(query, location, results_per_page, posted_within, source)
+    cached = job_cache.get(key)
+    if cached is not None:
+        return cached
+
     if source == "jsearch":
-        return fetch_from_jsearch(query, location, results_per_page, posted_within)
+        result = fetch_from_jsearch(query, location, results_per_page, posted_within)
+    else:
+        result = fetch_from_adzuna(query, location, results_per_page, posted_within)
+
+    if "error" not in result:
+        job_cache.set(key, result)
+    return result
+
+async def fetch_job_postings_async(query="data analyst", location="San Diego", results_per_page=10, posted_within="Any time", source="adzuna"):
+    if source == "local":
+        return await asyncio.to_thread(search_local_jobs, query, location, results_per_page, posted_within)
+
+    key = job_cache_key(query, location, results_per_page, posted_within, source)
+    cached = job_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if results_per_page > PAGE_SIZES.get(source, PAGE_SIZES["adzuna"]):
+        result = await collect_job_pages(query, location, results_per_page, posted_within, source)
+    elif source == "jsearch":
+        result = await fetch_from_jsearch_async(query, location, results_per_page, posted_within)
     else:
-        return fetch_from_adzuna(query, location, results_per_page, posted_within)
+        result = await fetch_from_adzuna_async(query, location, results_per_page, posted_within)
+
+    if "error" not in result:
+        job_cache.set(key, result)
+    return result
+
+async def fetch_job_page(query, location, page, posted_within, source):
+    # Returns (jobs, done, error); done means later pages cannot add anything
+    page_size = PAGE_SIZES.get(source, PAGE_SIZES["adzuna"])
+    try:
+        if source == "jsearch":
+            if not RAPIDAPI_KEY:
+                return [], True, "Missing RAPIDAPI_KEY in .env"
+            params, headers = jsearch_request(query, location, page)
+            if posted_within in JSEARCH_DATE_POSTED:
+                params["date_posted"] = JSEARCH_DATE_POSTED[posted_within]
+            response = await get_async_client().get(JSEARCH_URL, headers=headers, params=params)
+            response.raise_for_status()
+            data = response.json()
+            raw_count = len(data.get("data", []))
+            jobs = first_results(parse_jsearch(data, query, location, posted_within), page_size)["results"]
+        else:
+            if not APP_ID or not APP_KEY:
+                return [], True, "Missing ADZUNA_APP_ID or ADZUNA_APP_KEY in .env"
+            params = adzuna_request(query, location, page_size)
+            params["sort_by"] = "date"
+            response = await get_async_client().get(ADZUNA_URL.format(page=page), params=params)
+            response.raise_for_status()
+            data = response.json()
+            raw_count = len(data.get("results", []))
+            jobs = parse_adzuna(data, query, location, posted_within)["results"]
+        await asyncio.to_thread(store_jobs, jobs, source)
+    except Exception as e:
+        return [], True, str(e) or type(e).__name__
+
+    # Pages are date ordered, so a short page or one that lost jobs to the date filter is the last useful one
+    return jobs, raw_count < page_size or len(jobs) < raw_count, None
+
+async def stream_job_postings(query="data analyst", location="San Diego", results_per_page=10, posted_within="Any time", source="adzuna"):
+    # Async generator of jobs, served from job_cache under the same key as fetch_job_postings.
+    # A failure is yielded as a single {"error": ...} item and ends the stream. A stream that
+    # completes is cached; one that fails or is abandoned by the client is not.
+    if source == "local":
+        result = await asyncio.to_thread(search_local_jobs, query, location, results_per_page, posted_within)
+        for item in result.get("results", [result]):
+            yield item
+        return
+
+    key = job_cache_key(query, location, results_per_page, posted_within, source)
+    cached = job_cache.get(key)
+    if cached is not None:
+        for job in cached.get("results", []):
+            yield job
+        return
+
+    jobs = []
+    async for item in stream_job_pages(query, location, results_per_page, posted_within, source):
+        if "error" in item:
+            yield item
+            return
+        jobs.append(item)
+        yield item
+    job_cache.set(key, {"query": query, "location": location, "results": jobs})
+
+async def stream_job_pages(query, location, results_per_page, posted_within, source):
+    # Fetches up to JOB_PAGE_CONCURRENCY pages ahead and yields jobs in page order, stopping at
+    # results_per_page jobs or the first page that cannot be followed by anything useful
+    page_size = PAGE_SIZES.get(source, PAGE_SIZES["adzuna"])
+    last_page = min(JOB_MAX_PAGES, max(1, math.ceil(results_per_page / page_size)))
+    pending = deque()
+    next_page = 1
+    sent = 0
+
+    def schedule():
+        nonlocal next_page
+        while next_page <= last_page and len(pending) < JOB_PAGE_CONCURRENCY:
+            pending.append(asyncio.create_task(fetch_job_page(query, location, next_page, posted_within, source)))
+            next_page += 1
+
+    schedule()
+    try:
+        while pending:
+            jobs, done, error = await pending.popleft()
+            if error:
+                yield {"error": error}
+                return
+            for job in jobs:
+                if sent >= results_per_page:
+                    return
+                yield job
+                sent += 1
+            if done:
+                return
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def collect_job_pages(query, location, results_per_page, posted_within, source):
+    jobs = []
+    async for item in stream_job_pages(query, location, results_per_page, posted_within, source):
+        if "error" in item:
+            if not jobs:
+                return item
+            break
+        jobs.append(item)
+    return {"query": query, "location": location, "results": jobs}
+
+def batch_keys(queries):
+    # One response key per payload: its "label", else its query, else "<source>:<query>" when the
+    # same query runs on several sources, with a "#n" suffix as a last resort. Repeated labels are
+    # a caller error, since they name the results, so they raise ValueError.
+    keys = []
+    for i, q in enumerate(queries):
+        label = q.get("label")
+        if label:
+            if label in keys:
+                raise ValueError(f"Duplicate batch label: {label}")
+            keys.append(label)
+            continue
+        query = q.get("query") or f"query_{i+1}"
+        key = query
+        if key in keys:
+            key = f"{q.get('source') or 'adzuna'}:{query}"
+        n = 2
+        while key in keys:
+            key = f"{q.get('source') or 'adzuna'}:{query}#{n}"
+            n += 1
+        keys.append(key)
+    return keys
+
+async def fetch_job_postings_batch(queries, max_concurrency=BATCH_MAX_WORKERS):
+    # Each query is a fetch_job_postings payload; an optional "label" names it in the response
+    keys = batch_keys(queries)
+    payloads = [{k: v for k, v in q.items() if k != "label"} for q in queries]
+    limit = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(payload):
+        async with limit:
+            try:
+                return await fetch_job_postings_async(**payload)
+            except Exception as e:
+                return {"error": str(e)}
+
+    results = dict(zip(keys, await asyncio.gather(*(run(p) for p in payloads))))
+
+    # Merge across queries, keeping the first copy of a posting (exact or near duplicate) and recording every query it matched
+    dedup = JobDeduplicator()
+    for key in keys:
+        for job in results[key].get("results", []):
+            dedup.add(dict(job, search_label=key))
+
+    return {"results": results, "jobs": dedup.jobs, "duplicates_removed": dedup.duplicates}
@@ -0,0 +1,144 @@
+# mcp_server/tools/job_store.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from utils.job_dedup import job_key
+
+load_dotenv()
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", ".cache/job_store.sqlite")
+
+POSTED_WITHIN_DAYS = {
+    "Today": 0,
+    "Past 3 days": 3,
+    "Past week": 7,
+    "Past month": 30
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    source TEXT,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    url TEXT,
+    created TEXT,
+    description TEXT,
+    first_seen REAL,
+    last_seen REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, company, location, description, content='jobs', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts (rowid, title, company, location, description)
+    VALUES (new.rowid, new.title, new.company, new.location, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location, description)
+    VALUES ('delete', old.rowid, old.title, old.company, old.location, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+    INSERT INTO jobs_fts (jobs_fts, rowid, title, company, location, description)
+    VALUES ('delete', old.rowid, old.title, old.company, old.location, old.description);
+    INSERT INTO jobs_fts (rowid, title, company, location, description)
+    VALUES (new.rowid, new.title, new.company, new.location, new.description);
+END;
+"""
+
+def job_id(job):
+    return hashlib.sha1(job_key(job).encode("utf-8")).hexdigest()
+
+def fts_query(text):
+    # Quote every word so user input can never be read as FTS syntax; words are ANDed
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{w}"' for w in words)
+
+class JobStore:
+    def __init__(self, path=JOB_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def upsert_jobs(self, jobs, source):
+        now = time.time()
+        rows = [
+            (
+                job_id(job), source, job.get("title", ""), job.get("company", ""), job.get("location", ""),
+                job.get("url", ""), job.get("created") or "", job.get("description", ""), now, now
+            )
+            for job in jobs
+        ]
+        with self._lock:
+            self._db.executemany(
+                """
+                INSERT INTO jobs (job_id, source, title, company, location, url, created, description, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job_id) DO UPDATE SET
+                    title = excluded.title, company = excluded.company, location = excluded.location,
+                    url = excluded.url, created = excluded.created, description = excluded.description,
+                    last_seen = excluded.last_seen
+                """,
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def search_jobs(self, query="", location="", posted_within="Any time", source=None, limit=50, sort="newest"):
+        # sort is "newest" or "relevance" (bm25 over title, company, location and description)
+        clauses, params = [], []
+        match = fts_query(query)
+        if match:
+            clauses.append("jobs_fts MATCH ?")
+            params.append(match)
+        if location and location.strip().lower() != "remote":
+            clauses.append("jobs.location LIKE ?")
+            params.append(f"%{location.strip()}%")
+        if posted_within in POSTED_WITHIN_DAYS:
+            cutoff = datetime.utcnow() - timedelta(days=POSTED_WITHIN_DAYS[posted_within] + 1)
+            clauses.append("jobs.created >= ?")
+            params.append(cutoff.strftime("%Y-%m-%dT%H:%M:%S"))
+        if source:
+            clauses.append("jobs.source = ?")
+            params.append(source)
+
+        sql = "SELECT jobs.* FROM jobs"
+        if match:
+            sql += " JOIN jobs_fts ON jobs_fts.rowid = jobs.rowid"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if match and sort == "relevance":
+            sql += " ORDER BY bm25(jobs_fts)"
+        else:
+            sql += " ORDER BY jobs.created DESC"
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+_store = None
+
+def get_job_store():
+    global _store
+    if _store is None:
+        _store = JobStore()
+    return _store
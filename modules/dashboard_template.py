@@ -19,6 +19,8 @@ def display_dashboard(data):
                 st.markdown(f"{job['location']}")
             with col3:
                 st.markdown(job.get("date_display", "Date not available"))
+                if "relevance" in job:
+                    st.caption(f"Resume match: {job['relevance']:.0%}")
 
             if job.get("description"):
                 desc = job["description"].split(".")[0] + "." if "." in job["description"] else job["description"][:150] + "..."
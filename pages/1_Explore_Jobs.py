@@ -1,8 +1,10 @@
 # pages\1_Explore_Jobs.py
 
 import streamlit as st
-from utils.data_fetcher import call_mcp_tool
+from utils.data_fetcher import call_mcp_tool, call_mcp_tool_batch, stream_mcp_tool
 from modules.dashboard_template import display_dashboard
+from utils.job_dedup import JobDeduplicator
+from utils.job_ranker import get_resume_matcher, rank_jobs
 import json
 import streamlit as st
 from utils.profile_loader import load_user_profile
@@ -37,14 +39,16 @@ with st.sidebar:
     custom_keywords = st.text_input("Or enter keywords (comma-separated):", value="")
 
     location = st.text_input("Location or ZIP", value="Remote")
-    results_per_page = st.slider("Number of results:", 1, 20, 10)
+    results_per_page = st.slider("Number of results:", 1, 100, 10)
     date_filter = st.selectbox("Posted Within:", ["Any time", "Today", "Past 3 days", "Past week", "Past month"])
-    selected_source = st.selectbox("Job Source", ["Adzuna", "JSearch"])
+    selected_source = st.selectbox("Job Source", ["Adzuna", "JSearch", "Local"], help="Local searches every job fetched so far, offline.")
+    sort_by = st.selectbox("Sort results by", ["Match to my resume", "Newest"])
     run_search = st.button("Search Jobs")
 
 # --- Main Panel ---
 if run_search:
-    keyword_list = [k.strip() for k in custom_keywords.split(",") if k.strip()]
+    # Each keyword names its results in the batch response, so repeats are dropped
+    keyword_list = list(dict.fromkeys(k.strip() for k in custom_keywords.split(",") if k.strip()))
     selected_jobs = []
 
     if keyword_list:
@@ -57,29 +61,71 @@ if run_search:
         selected_jobs = [(selected_label, job_categories[selected_label])]
         query_label = selected_label
 
-    all_results = []
-
-    for label, query in selected_jobs:
-        with st.spinner(f"Fetching jobs for '{query}' in {location} from {selected_source}..."):
-            payload = {
-                "query": query,
-                "location": location,
-                "results_per_page": results_per_page,
-                "posted_within": date_filter,
-                "source": selected_source.lower()
-            }
+    # Overlapping keywords return the same postings; keep one copy of each
+    dedup = JobDeduplicator()
+    all_results = dedup.jobs
+    payloads = [
+        {
+            "query": query,
+            "location": location,
+            "results_per_page": results_per_page,
+            "posted_within": date_filter,
+            "source": selected_source.lower()
+        }
+        for _, query in selected_jobs
+    ]
+
+    progress = st.empty()
+    results_area = st.empty()
+
+    # Scores every job against the active profile's master resume; the resume vector is cached per profile.
+    # Without one (or when sorting by date) results are ordered newest first.
+    matcher = get_resume_matcher(st.session_state["active_profile"]) if sort_by == "Match to my resume" else None
+
+    def render_results():
+        ordered = rank_jobs(all_results, matcher)
+        with results_area.container():
+            st.subheader(f"Results for '{query_label}' in {location}")
+            display_dashboard({"results": ordered, "query": query_label, "location": location})
+
+    with st.spinner(f"Fetching {len(payloads)} search(es) in {location} from {selected_source}..."):
+        if len(payloads) == 1:
+            # A single search streams page by page, so large result sets show up before every page is in
+            label = selected_jobs[0][0]
             try:
-                result = call_mcp_tool("fetch_job_postings", payload)
-                if "results" in result:
-                    for job in result["results"]:
-                        job["search_label"] = label
-                    all_results.extend(result["results"])
+                for received, item in enumerate(stream_mcp_tool("fetch_job_postings", payloads[0]), start=1):
+                    if "error" in item:
+                        st.error(f"Failed to fetch jobs for {label}: {item['error']}")
+                        break
+                    item["search_label"] = label
+                    dedup.add(item)
+                    if received % 10 == 0:
+                        progress.caption(f"Loaded {received} jobs...")
+                        render_results()
             except Exception as e:
                 st.error(f"Failed to fetch jobs for {label}: {e}")
-
-    if all_results:
-        st.subheader(f"Results for '{query_label}' in {location}")
-        display_dashboard({"results": all_results, "query": query_label, "location": location})
+            if all_results:
+                render_results()
+        else:
+            # All searches go out in one request; the server runs them concurrently and merges duplicates
+            batch = [dict(payload, label=label) for payload, (label, _) in zip(payloads, selected_jobs)]
+            try:
+                response = call_mcp_tool_batch("fetch_job_postings", batch)
+            except Exception as e:
+                st.error(f"Failed to fetch jobs: {e}")
+                response = {}
+            for label, result in response.get("results", {}).items():
+                if "error" in result:
+                    st.error(f"Failed to fetch jobs for {label}: {result['error']}")
+            dedup.extend(response.get("jobs", []))
+            dedup.duplicates += response.get("duplicates_removed", 0)
+            if all_results:
+                render_results()
+    progress.empty()
+    # Kept for batch tailoring on the Tailor Resume page
+    st.session_state["job_results"] = rank_jobs(all_results, matcher)
+    if dedup.duplicates:
+        st.caption(f"Hid {dedup.duplicates} duplicate posting(s) found under several searches.")
 
 # --- Dev Section ---
 st.markdown("### Developer Tool (Manual Input)")
@@ -2,12 +2,14 @@
 
 import streamlit as st
 import pandas as pd
+import base64
 import json
-import os
-import csv
 import unicodedata
-from resume.generate_pdf import create_ats_resume_pdf
+from resume.generate_pdf import render_resume_pdf_bytes
+from resume.live_preview import PREVIEW_DEBOUNCE, LivePreview
 from utils.profile_loader import load_user_profile
+from utils.profile_store import get_profile_store
+from utils.resume_model import Resume
 
 if "active_profile" not in st.session_state:
     st.warning("Please select a user profile before continuing.")
@@ -15,7 +17,7 @@ if "active_profile" not in st.session_state:
 
 profile_name = st.session_state["active_profile"]
 profile = load_user_profile(profile_name)
-master_resume_path = os.path.join("users", f"{profile_name}_master_resume.csv")
+profile_store = get_profile_store()
 
 st.set_page_config(page_title="Guided Resume Builder", layout="wide")
 st.title("Guided Resume Builder")
@@ -23,58 +25,48 @@ st.title("Guided Resume Builder")
 def normalize_text(text):
     return unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
 
-def group_blocks(df, section):
-    grouped = []
-    for sub in df[df.section == section].subsection.unique():
-        merged = "\n".join(df[(df.section == section) & (df.subsection == sub)].content.tolist())
-        lines = [line for line in merged.split("\n") if line.strip()]
-        if lines:
-            grouped.append((sub, lines))
-    return grouped
-
-def get_val(df, sec, sub):
-    match = df[(df.section == sec) & (df.subsection == sub)]
-    return match.content.values[0] if not match.empty else ""
-
 # === File Upload or Master Resume Loader ===
-df_master = pd.DataFrame(columns=["section", "subsection", "content"])
+# The loaded resume is parsed and indexed once per upload and kept in session state as a Resume;
+# reruns read fields from its index instead of filtering a DataFrame for every field.
 use_master = False
 
 uploaded = st.file_uploader("Upload a resume (CSV or JSON)", type=["csv", "json"])
-if os.path.exists(master_resume_path):
+if profile_store.has_master_resume(profile_name):
     if st.button("Use Master Resume"):
         use_master = True
 
 if uploaded:
-    if uploaded.name.endswith(".json"):
-        df_loaded = pd.DataFrame(json.load(uploaded))
-        st.success("JSON uploaded and loaded.")
-    else:
-        df_loaded = pd.read_csv(uploaded, quoting=csv.QUOTE_MINIMAL)
-        st.success("CSV uploaded and loaded.")
-    st.session_state["df_master"] = df_loaded.copy()
+    # The uploader keeps returning the same file on every rerun; only parse it when a new upload arrives
+    upload_id = uploaded.file_id
+    if st.session_state.get("resume_upload_id") != upload_id:
+        if uploaded.name.endswith(".json"):
+            st.session_state["resume"] = Resume.from_records(json.load(uploaded))
+        else:
+            st.session_state["resume"] = Resume.from_csv(uploaded)
+        st.session_state["resume_upload_id"] = upload_id
+    st.success(f"{'JSON' if uploaded.name.endswith('.json') else 'CSV'} uploaded and loaded.")
 
 elif use_master:
-    df_loaded = pd.read_csv(master_resume_path, quoting=csv.QUOTE_MINIMAL)
-    st.session_state["df_master"] = df_loaded.copy()
+    st.session_state["resume"] = profile_store.get_master_resume(profile_name)
+    st.session_state.pop("resume_upload_id", None)
     st.success("Master Resume loaded.")
 
 # Either from session or new blank
-df_master = st.session_state.get("df_master", pd.DataFrame(columns=["section", "subsection", "content"]))
+resume = st.session_state.get("resume") or Resume()
 
-if df_master.empty:
+if not len(resume):
     st.info("No file uploaded. Starting with a blank resume.")
 
 rows = []
 
 st.header("Personal Info")
-name = st.text_input("Full Name", get_val(df_master, "personal_info", "name"), key="name")
-location = st.text_input("Location", get_val(df_master, "personal_info", "location"), key="location")
-email = st.text_input("Email", get_val(df_master, "personal_info", "email"), key="email")
-phone = st.text_input("Phone", get_val(df_master, "personal_info", "phone"), key="phone")
-linkedin = st.text_input("LinkedIn", get_val(df_master, "personal_info", "linkedin"), key="linkedin")
-github = st.text_input("GitHub", get_val(df_master, "personal_info", "github"), key="github")
-portfolio = st.text_input("Portfolio", get_val(df_master, "personal_info", "portfolio"), key="portfolio")
+name = st.text_input("Full Name", resume.get("personal_info", "name"), key="name")
+location = st.text_input("Location", resume.get("personal_info", "location"), key="location")
+email = st.text_input("Email", resume.get("personal_info", "email"), key="email")
+phone = st.text_input("Phone", resume.get("personal_info", "phone"), key="phone")
+linkedin = st.text_input("LinkedIn", resume.get("personal_info", "linkedin"), key="linkedin")
+github = st.text_input("GitHub", resume.get("personal_info", "github"), key="github")
+portfolio = st.text_input("Portfolio", resume.get("personal_info", "portfolio"), key="portfolio")
 rows += [
     {"section": "personal_info", "subsection": "name", "content": name},
     {"section": "personal_info", "subsection": "location", "content": location},
@@ -86,17 +78,19 @@ rows += [
 ]
 
 st.header("Target Roles")
-roles = st.text_input("What roles are you targeting?", get_val(df_master, "personal_info", "target_roles"), key="target_roles")
+roles = st.text_input("What roles are you targeting?", resume.get("personal_info", "target_roles"), key="target_roles")
 rows.append({"section": "personal_info", "subsection": "target_roles", "content": roles})
 
 st.header("Professional Summary")
-summary = st.text_area("Write a 2-4 sentence summary of your strengths and interests", get_val(df_master, "professional_summary", "summary"), height=180)
+summary = st.text_area("Write a 2-4 sentence summary of your strengths and interests", resume.get("professional_summary", "summary"), height=180)
 if summary.strip():
     rows.append({"section": "professional_summary", "subsection": "summary", "content": summary})
 
 st.header("Technical Skills")
-skills_df = df_master[df_master.section == "technical_skills"][["subsection", "content"]].copy()
-skills_df["content"] = skills_df["content"].str.replace(r" \| ", ", ", regex=False)
+skills_df = pd.DataFrame(
+    [{"subsection": b.subsection, "content": b.content.replace(" | ", ", ")} for b in resume.section("technical_skills")],
+    columns=["subsection", "content"]
+)
 skills_editor = st.data_editor(skills_df if not skills_df.empty else pd.DataFrame([
     {"subsection": "Programming Languages", "content": "Python, SQL"},
 ]), num_rows="dynamic", use_container_width=True)
@@ -107,7 +101,7 @@ for _, row in skills_editor.iterrows():
         rows.append({"section": "technical_skills", "subsection": row["subsection"], "content": pipe})
 
 st.header("Professional Experience")
-exp_blocks = group_blocks(df_master, "professional_experience")
+exp_blocks = resume.grouped("professional_experience")
 exp_count = st.number_input("How many jobs?", min_value=1, max_value=10, value=max(1, len(exp_blocks)), step=1)
 
 for i in range(exp_count):
@@ -138,7 +132,7 @@ for i in range(exp_count):
             rows.append({"section": "professional_experience", "subsection": sub, "content": block})
 
 st.header("Certifications")
-cert_blocks = group_blocks(df_master, "certifications")
+cert_blocks = resume.grouped("certifications")
 cert_count = st.number_input("How many certifications?", min_value=1, max_value=20, value=max(1, len(cert_blocks)), step=1)
 
 for i in range(cert_count):
@@ -155,7 +149,7 @@ for i in range(cert_count):
             rows.append({"section": "certifications", "subsection": sub, "content": f"{title.strip()} | {date.strip()}"})
 
 st.header("Education")
-edu_blocks = group_blocks(df_master, "education")
+edu_blocks = resume.grouped("education")
 edu_count = st.number_input("How many education entries?", min_value=1, max_value=10, value=max(1, len(edu_blocks)), step=1)
 
 for i in range(edu_count):
@@ -185,7 +179,7 @@ for i in range(edu_count):
             rows.append({"section": "education", "subsection": sub, "content": block})
 
 st.header("Projects")
-proj_blocks = group_blocks(df_master, "projects")
+proj_blocks = resume.grouped("projects")
 proj_count = st.number_input("How many projects?", min_value=1, max_value=30, value=max(1, len(proj_blocks)), step=1)
 
 for i in range(proj_count):
@@ -210,30 +204,49 @@ for i in range(proj_count):
             rows.append({"section": "projects", "subsection": sub, "content": block})
 
 # Persist updated content into session
-st.session_state["df_master"] = pd.DataFrame([r for r in rows if str(r["content"]).strip()])
+resume_out = Resume.from_records(r for r in rows if str(r["content"]).strip())
+st.session_state["resume"] = resume_out
+
+st.header("Live Preview")
+if st.toggle("Show live PDF preview", key="live_preview_on", help="Re-renders shortly after you stop editing."):
+    if "live_preview" not in st.session_state:
+        st.session_state["live_preview"] = LivePreview()
+
+    # Polls on its own so the preview catches up once edits pause, without rerunning the whole page
+    @st.fragment(run_every=PREVIEW_DEBOUNCE)
+    def show_live_preview():
+        pdf_bytes, stale = st.session_state["live_preview"].update(st.session_state["resume"])
+        if pdf_bytes is None:
+            st.info("Add your name and target roles to see a preview.")
+            return
+        if stale:
+            st.caption("Updating preview...")
+        try:
+            st.pdf(pdf_bytes, height=800)
+        except Exception:
+            # st.pdf needs the streamlit[pdf] extra; fall back to the browser's own viewer
+            encoded = base64.b64encode(pdf_bytes).decode("ascii")
+            st.markdown(
+                f'<iframe src="data:application/pdf;base64,{encoded}" width="100%" height="800"></iframe>',
+                unsafe_allow_html=True
+            )
+
+    show_live_preview()
 
 st.header("Export Resume")
 col1, col2, col3 = st.columns([1, 1, 2])
 
 with col1:
-    csv_data = pd.DataFrame([r for r in rows if str(r["content"]).strip()])
-    st.download_button("⬇️ CSV", csv_data.to_csv(index=False).encode("utf-8"), file_name="resume_data.csv")
+    st.download_button("⬇️ CSV", resume_out.to_csv().encode("utf-8"), file_name="resume_data.csv")
 
 with col2:
-    st.download_button("⬇️ JSON", json.dumps(csv_data.to_dict(orient="records"), indent=2).encode("utf-8"), file_name="resume_data.json")
+    st.download_button("⬇️ JSON", json.dumps(resume_out.to_records(), indent=2).encode("utf-8"), file_name="resume_data.json")
 
 with col3:
     if st.button("Generate ATS PDF"):
-        df_out = pd.DataFrame([r for r in rows if str(r["content"]).strip()])
-        os.makedirs("exports", exist_ok=True)
-        csv_path = "exports/generated_resume.csv"
-        pdf_path = "exports/resume_output.pdf"
-
-        df_out.to_csv(csv_path, index=False)
-        create_ats_resume_pdf(csv_path, pdf_path)
-
-        if os.path.exists(pdf_path):
-            with open(pdf_path, "rb") as f:
-                st.download_button("⬇️ Download PDF", f, file_name="resume_output.pdf", mime="application/pdf")
+        # Rendered in memory from the edited rows: no temp files, and unchanged content comes from the render cache
+        pdf_bytes = render_resume_pdf_bytes(resume_out)
+        if pdf_bytes:
+            st.download_button("⬇️ Download PDF", pdf_bytes, file_name="resume_output.pdf", mime="application/pdf")
         else:
-            st.error("PDF generation failed. Please make sure you've filled out the form completely.")
\ No newline at end of file
+            st.error("PDF generation failed. Please make sure you've filled out the form completely.")
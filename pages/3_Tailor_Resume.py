@@ -2,9 +2,13 @@
 
 import streamlit as st
 import pandas as pd
-import os
+import time
 from utils.profile_loader import load_user_profile
+from utils.profile_store import get_profile_store
 from utils.resume_rewriter import full_resume_rewriter, enforce_all_guidelines
+from utils.batch_tailor import BATCH_EXPORT_DIR, tailor_jobs
+from utils.resume_model import Resume, ResumeBlock
+from resume.page_fit import fit_to_page
 
 st.set_page_config(page_title="Tailor Resume to Job", layout="wide")
 st.title("Tailor Your Resume for Any Job")
@@ -15,10 +19,10 @@ if "active_profile" not in st.session_state:
     st.stop()
 
 profile_name = st.session_state["active_profile"]
-profile = load_user_profile(f"users/{profile_name}.json")
-master_resume_path = f"users/{profile_name}_master_resume.csv"
+profile = load_user_profile(profile_name)
+master_resume = get_profile_store().get_master_resume(profile_name)
 
-if not os.path.exists(master_resume_path):
+if master_resume is None:
     st.error(f"Master resume not found for {profile_name}. Please upload it first in the profile page.")
     st.stop()
 
@@ -32,15 +36,48 @@ job_description = st.text_area(
 
 # --- Tailor Resume Button ---
 st.subheader("Step 2: Generate Tailored Resume")
+generation_mode = st.radio(
+    "Generation mode",
+    ["Single prompt (live output)", "Parallel sections (faster)"],
+    horizontal=True,
+    help="Parallel sections sends the summary, skills, each job and projects as separate prompts at the same time."
+)
+force_regenerate = st.checkbox("Force regenerate", help="Ignore the saved rewrite for this job description and call the LLM again.")
+fit_one_page = st.checkbox(
+    "Fit to one page",
+    value=True,
+    help="Drop the bullets and projects least relevant to this job until the PDF fits on one page. No extra LLM calls."
+)
 if st.button("Tailor Resume", disabled=not job_description.strip()):
     with st.spinner("Tailoring your resume to match the job..."):
 
         # Load master resume as list of dict blocks
-        df_master = pd.read_csv(master_resume_path)
-        resume_rows = df_master.to_dict(orient="records")
+        resume_rows = master_resume.to_records()
+
+        # --- Call Llama3 (Ollama) to tailor resume, showing tokens as they stream in ---
+        live_output = st.empty()
+        streamed = []
+        last_paint = [0.0]
 
-        # --- Call Llama3 (Ollama) to tailor resume ---
-        result = full_resume_rewriter(job_description, resume_rows)
+        def show_token(token):
+            streamed.append(token)
+            now = time.monotonic()
+            if now - last_paint[0] > 0.2:
+                live_output.code("".join(streamed)[-4000:], language="text")
+                last_paint[0] = now
+
+        if generation_mode.startswith("Parallel"):
+            result = full_resume_rewriter(job_description, resume_rows, force_regenerate=force_regenerate, mode="sectioned")
+        else:
+            result = full_resume_rewriter(job_description, resume_rows, on_token=show_token, force_regenerate=force_regenerate, mode="single")
+        live_output.empty()
+        if result.get("failed_sections"):
+            st.warning(
+                "These sections kept your master resume wording because the LLM failed on them: "
+                + ", ".join(result["failed_sections"])
+            )
+        if result.get("cached"):
+            st.info("Reused the saved rewrite for this job description. Tick **Force regenerate** for a fresh one.")
         tailored_blocks = result.get("rewritten_blocks", None)
         if isinstance(tailored_blocks, str):
             try:
@@ -51,15 +88,21 @@ if st.button("Tailor Resume", disabled=not job_description.strip()):
 
         # --- Enforce ALL guidelines and rules after LLM ---
         tailored_blocks = enforce_all_guidelines(tailored_blocks, resume_rows)
-        df_tailored = pd.DataFrame([
-            {
-                "section": b.get("section", "").strip(),
-                "subsection": b.get("subsection", "").strip(),
-                "content": b.get("content", "").strip(),
-            }
+        if fit_one_page:
+            tailored_blocks, fit_report = fit_to_page(tailored_blocks, job_description)
+            if fit_report["pages"] > 1:
+                st.warning(f"Still {fit_report['pages']} pages after trimming; shorten the summary or skills to fit one page.")
+            elif fit_report["removed"]:
+                st.caption(
+                    f"Trimmed {len(fit_report['removed'])} less relevant line(s) to fit one page "
+                    f"(was {fit_report['pages_before']} pages)."
+                )
+        tailored = Resume(
+            ResumeBlock(b.get("section", "").strip(), b.get("subsection", "").strip(), b.get("content", "").strip())
             for b in tailored_blocks
             if b.get("section") is not None and b.get("content") is not None
-        ])
+        )
+        df_tailored = tailored.to_dataframe()
 
         # --- Show preview as table ---
         st.success("Tailored resume generated below! Review, then download or send to builder.")
@@ -68,12 +111,13 @@ if st.button("Tailor Resume", disabled=not job_description.strip()):
         # --- Download CSV and send to 2_Create_Resume.py ---
         st.download_button(
             "⬇️ Download Tailored CSV",
-            df_tailored.to_csv(index=False),
+            tailored.to_csv(),
             file_name="tailored_resume.csv"
         )
 
         # Set session state so user can continue in 2_Create_Resume.py
-        st.session_state["df_master"] = df_tailored.copy()
+        st.session_state["resume"] = tailored
+        st.session_state.pop("resume_upload_id", None)
         st.markdown(
             """
             ### Next Step:
@@ -82,4 +126,43 @@ if st.button("Tailor Resume", disabled=not job_description.strip()):
         )
 
 else:
-    st.info("Paste a job description and click **Tailor Resume** to generate your tailored resume.")
\ No newline at end of file
+    st.info("Paste a job description and click **Tailor Resume** to generate your tailored resume.")
+
+# --- Batch: tailor for jobs found in Explore Jobs ---
+st.divider()
+st.subheader("Batch: Tailor for Several Jobs")
+found_jobs = st.session_state.get("job_results", [])
+if not found_jobs:
+    st.caption("Run a search in **Explore Jobs** to tailor your resume for several postings in one go.")
+else:
+    job_labels = [f"{job.get('title', 'No Title')} | {job.get('company', 'N/A')}" for job in found_jobs]
+    shortlist = st.multiselect(
+        "Shortlist jobs to tailor for:",
+        list(range(len(found_jobs))),
+        format_func=lambda i: job_labels[i]
+    )
+    if st.button("Tailor Shortlist", disabled=not shortlist):
+        progress_bar = st.progress(0.0, text="Starting batch...")
+
+        def show_progress(finished, total, entry):
+            text = f"{finished}/{total} done"
+            if entry:
+                text += f" (last: {entry['title']}, {entry['status']})"
+            progress_bar.progress(finished / total, text=text)
+
+        resume_rows = master_resume.to_records()
+        outcomes = tailor_jobs(
+            [found_jobs[i] for i in shortlist], resume_rows, on_progress=show_progress,
+            force_regenerate=force_regenerate, fit_page=fit_one_page
+        )
+        st.dataframe(
+            pd.DataFrame(outcomes).reindex(columns=["title", "company", "status", "failed_sections", "csv", "pdf", "error"]),
+            use_container_width=True,
+            hide_index=True
+        )
+        failed = sum(1 for o in outcomes if o.get("status") != "done")
+        if failed:
+            st.warning(f"{failed} job(s) failed or were only partly tailored. Click **Tailor Shortlist** again to retry only those.")
+        else:
+            st.success(f"All tailored resumes were saved to `{BATCH_EXPORT_DIR}`.")
+
@@ -1,10 +1,17 @@
 # resume\generate_pdf.py
 
-import pandas as pd
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from reportlab.lib.pagesizes import LETTER
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
 from reportlab.lib.utils import simpleSplit
-import csv
+from utils.resume_model import Resume
+from utils.ttl_cache import TTLCache
 
 # Layout constants
 LEFT_MARGIN = 50
@@ -18,38 +25,122 @@ SUBHEADER_FONT = ("Helvetica-Bold", 11)
 NORMAL_FONT = ("Helvetica", 9)
 ITALIC_FONT = ("Helvetica-Oblique", 9)
 
+# Rendered PDFs kept in memory, keyed by a hash of the resume content
+PDF_CACHE_MAX_ENTRIES = int(os.getenv("PDF_CACHE_MAX_ENTRIES", "32"))
 
-def check_page_break(c, y_position):
-    if y_position < LINE_HEIGHT * 2:
-        c.showPage()
-        c.setFont(*NORMAL_FONT)
-        return PAGE_HEIGHT - TOP_MARGIN
-    return y_position
-
-
-def draw_text_with_bold(c, text, x, y, width):
-    # preserve line breaks from multiline content
-    paragraphs = text.split('\n')
-    for para in paragraphs:
-        lines = simpleSplit(para.strip(), NORMAL_FONT[0], NORMAL_FONT[1], width - LEFT_MARGIN * 2)
-        for line in lines:
-            x_pos = LEFT_MARGIN
-            segments = line.split('**')
-            bold = False
-            for segment in segments:
-                font = ("Helvetica-Bold", NORMAL_FONT[1]) if bold else NORMAL_FONT
-                c.setFont(*font)
-                c.drawString(x_pos, y, segment)
-                seg_width = c.stringWidth(segment, font[0], font[1])
-                x_pos += seg_width
-                bold = not bold
-            y -= LINE_HEIGHT
-            y = check_page_break(c, y)
-    return y
+
+SECTION_ORDER = [
+    "personal_info",
+    "professional_summary",
+    "technical_skills",
+    "professional_experience",
+    "education",
+    "certifications",
+    "projects"
+]
+BOLD_FONT = ("Helvetica-Bold", NORMAL_FONT[1])
+TEXT_WIDTH = PAGE_WIDTH - LEFT_MARGIN * 2
+
+
+@lru_cache(maxsize=8192)
+def text_width(text, font):
+    return pdfmetrics.stringWidth(text, font[0], font[1])
+
+
+@lru_cache(maxsize=8192)
+def layout_paragraph(para):
+    # Wrapped lines of one paragraph, each a tuple of (x offset, text, font) runs; "**" toggles bold.
+    # Wrapping measures the raw line, markers included, as the original renderer did.
+    lines = []
+    for line in simpleSplit(para.strip(), NORMAL_FONT[0], NORMAL_FONT[1], TEXT_WIDTH):
+        runs, x, bold = [], 0.0, False
+        for segment in line.split('**'):
+            font = BOLD_FONT if bold else NORMAL_FONT
+            if segment:
+                runs.append((x, segment, font))
+                x += text_width(segment, font)
+            bold = not bold
+        lines.append(tuple(runs))
+    return tuple(lines)
+
+
+def layout_block(content):
+    # Line breaks in the content are kept as paragraph breaks
+    return tuple(line for para in content.split('\n') for line in layout_paragraph(para))
+
+
+@lru_cache(maxsize=256)
+def layout_section(contents):
+    # Layout of every block in a section, keyed by the section's block contents, so a re-render
+    # after an edit elsewhere reuses this section without touching it again
+    return tuple(layout_block(content) for content in contents)
+
+
+class ResumeCanvas:
+    # A reportlab canvas plus the cursor position; setFont is only emitted when the font changes
+    def __init__(self, output):
+        self.c = canvas.Canvas(output, pagesize=LETTER)
+        self.y = PAGE_HEIGHT - TOP_MARGIN
+        self.font = None
+
+    def set_font(self, font):
+        if font != self.font:
+            self.c.setFont(*font)
+            self.font = font
+
+    def draw(self, x, text, font):
+        self.set_font(font)
+        self.c.drawString(x, self.y, text)
+
+    def advance(self, dy):
+        self.y -= dy
+        if self.y < LINE_HEIGHT * 2:
+            self.new_page()
+
+    def new_page(self):
+        self.c.showPage()
+        self.font = None
+        self.y = PAGE_HEIGHT - TOP_MARGIN
+
+    def draw_lines(self, lines):
+        for runs in lines:
+            for x, text, font in runs:
+                self.draw(LEFT_MARGIN + x, text, font)
+            self.advance(LINE_HEIGHT)
+
+    def rule(self):
+        self.c.line(LEFT_MARGIN, self.y, PAGE_WIDTH - LEFT_MARGIN, self.y)
+
+    def save(self):
+        self.c.save()
+
+
+class LayoutMeter(ResumeCanvas):
+    # Walks exactly the layout ResumeCanvas draws, without a canvas, to count the pages it needs
+    def __init__(self):
+        self.y = PAGE_HEIGHT - TOP_MARGIN
+        self.font = None
+        self.pages = 1
+
+    def set_font(self, font):
+        pass
+
+    def draw(self, x, text, font):
+        pass
+
+    def new_page(self):
+        self.pages += 1
+        self.y = PAGE_HEIGHT - TOP_MARGIN
+
+    def rule(self):
+        pass
+
+    def save(self):
+        pass
 
 
 def is_content_visible(text):
-    if not text or pd.isna(text):
+    if not text:
         return False
     stripped = text.replace("**", "").replace("|", "").strip()
     return bool(stripped)
@@ -57,84 +148,119 @@ def is_content_visible(text):
 
 def create_ats_resume_pdf(csv_path, output_path):
     try:
-        df = pd.read_csv(csv_path, sep=',', engine='python', quoting=csv.QUOTE_MINIMAL)
+        resume = Resume.from_csv(csv_path)
     except Exception as e:
         print(f"Error reading CSV: {e}")
         return
+    render_resume_pdf(resume, output_path)
 
-    section_order = [
-        "personal_info",
-        "professional_summary",
-        "technical_skills",
-        "professional_experience",
-        "education",
-        "certifications",
-        "projects"
-    ]
 
-    try:
-        name = df.loc[(df["section"] == "personal_info") & (df["subsection"] == "name"), "content"].values[0]
-        target_roles = df.loc[(df["section"] == "personal_info") & (df["subsection"] == "target_roles"), "content"].values[0]
-        role_set = list(dict.fromkeys([r.strip() for r in target_roles.split('|')]))
-        target_roles = " | ".join(role_set)
-    except IndexError:
+def render_resume_pdf(resume, output_path):
+    # resume is a Resume or a list of section/subsection/content records; output_path may be a
+    # path or a binary file object. Returns output_path, or None when name/target_roles are missing.
+    if not isinstance(resume, Resume):
+        resume = Resume.from_records(resume)
+
+    if ("personal_info", "name") not in resume or ("personal_info", "target_roles") not in resume:
         print("Required personal_info fields (name/target_roles) are missing in the CSV.")
-        return
+        return None
+    draw_resume(ResumeCanvas(output_path), resume).save()
+    if isinstance(output_path, (str, os.PathLike)):
+        print(f"ATS resume saved to {output_path}")
+    return output_path
 
-    personal_info = df[(df["section"] == "personal_info") & (~df["subsection"].isin(["name", "target_roles"]))]
-    personal_info_string = " • ".join(personal_info["content"].dropna().astype(str).tolist())
 
-    portfolio = df.loc[(df["section"] == "personal_info") & (df["subsection"] == "portfolio"), "content"].values
-    portfolio_link = portfolio[0] if len(portfolio) > 0 else None
+def count_pages(resume):
+    # Pages render_resume_pdf would produce, measured with the same fonts and layout
+    if not isinstance(resume, Resume):
+        resume = Resume.from_records(resume)
+    return draw_resume(LayoutMeter(), resume).pages
 
-    c = canvas.Canvas(output_path, pagesize=LETTER)
-    y = PAGE_HEIGHT - TOP_MARGIN
 
-    c.setFont(*HEADER_FONT)
-    c.drawString(LEFT_MARGIN, y, name)
-    y -= LINE_HEIGHT
-    y = check_page_break(c, y)
+def draw_resume(page, resume):
+    name = resume.get("personal_info", "name")
+    role_set = list(dict.fromkeys([r.strip() for r in resume.get("personal_info", "target_roles").split('|')]))
+    target_roles = " | ".join(role_set)
 
-    c.setFont(*NORMAL_FONT)
-    c.drawString(LEFT_MARGIN, y, personal_info_string)
-    y -= LINE_HEIGHT
-    y = check_page_break(c, y)
+    personal_info_string = " • ".join(
+        b.content for b in resume.section("personal_info") if b.subsection not in ("name", "target_roles") and b.content
+    )
+    portfolio_link = resume.get("personal_info", "portfolio") or None
 
-    c.setFont(*ITALIC_FONT)
-    c.drawString(LEFT_MARGIN, y, target_roles)
-    y -= int(LINE_HEIGHT * 1.25)
-    y = check_page_break(c, y)
+    page.draw(LEFT_MARGIN, name, HEADER_FONT)
+    page.advance(LINE_HEIGHT)
+    page.draw(LEFT_MARGIN, personal_info_string, NORMAL_FONT)
+    page.advance(LINE_HEIGHT)
+    page.draw(LEFT_MARGIN, target_roles, ITALIC_FONT)
+    page.advance(int(LINE_HEIGHT * 1.25))
 
-    for section in section_order:
+    for section in SECTION_ORDER:
         if section == "personal_info":
             continue
 
-        group = df[df["section"] == section]
-        group = group[group["content"].apply(is_content_visible)]
-        if group.empty:
+        contents = tuple(b.content.strip() for b in resume.section(section) if is_content_visible(b.content))
+        if not contents:
             continue
 
-        c.setFont(*SUBHEADER_FONT)
-        section_title = section.replace("_", " ").title()
-        c.drawString(LEFT_MARGIN, y, section_title)
-        y -= 8
-        c.line(LEFT_MARGIN, y, PAGE_WIDTH - LEFT_MARGIN, y)
-        y -= int(LINE_HEIGHT * 1.1)
-        y = check_page_break(c, y)
+        page.draw(LEFT_MARGIN, section.replace("_", " ").title(), SUBHEADER_FONT)
+        page.y -= 8
+        page.rule()
+        page.advance(int(LINE_HEIGHT * 1.1))
 
-        for _, row in group.iterrows():
-            content = row["content"].strip()
-            y = draw_text_with_bold(c, content, LEFT_MARGIN, y, PAGE_WIDTH)
-            y -= 3
-            y = check_page_break(c, y)
+        for lines in layout_section(contents):
+            page.draw_lines(lines)
+            page.advance(3)
 
-        y -= 8
-        y = check_page_break(c, y)
+        page.advance(8)
 
     if portfolio_link:
-        y = LINE_HEIGHT * 2
-        c.setFont(*ITALIC_FONT)
-        c.drawString(LEFT_MARGIN, y, f"Self-designed Portfolio: https://{portfolio_link}")
+        page.y = LINE_HEIGHT * 2
+        page.draw(LEFT_MARGIN, f"Self-designed Portfolio: https://{portfolio_link}", ITALIC_FONT)
+    return page
+
+
+_pdf_cache = TTLCache(max_entries=PDF_CACHE_MAX_ENTRIES)
+
+
+def resume_content_hash(resume):
+    records = resume.to_records() if isinstance(resume, Resume) else Resume.from_records(resume).to_records()
+    payload = json.dumps(records, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_resume_pdf_bytes(resume, content_hash=None):
+    # Renders straight into memory, no files involved; identical content is served from the render
+    # cache. Returns None when name/target_roles are missing.
+    if not isinstance(resume, Resume):
+        resume = Resume.from_records(resume)
+    key = content_hash or resume_content_hash(resume)
+    cached = _pdf_cache.get(key)
+    if cached is not None:
+        return cached
+    buffer = io.BytesIO()
+    if render_resume_pdf(resume, buffer) is None:
+        return None
+    pdf_bytes = buffer.getvalue()
+    _pdf_cache.set(key, pdf_bytes)
+    return pdf_bytes
+
+
+def _render_records(records, output_path):
+    try:
+        return render_resume_pdf(records, output_path)
+    except Exception as e:
+        print(f"Error rendering {output_path}: {e}")
+        return None
+
 
-    c.save()
-    print(f"ATS resume saved to {output_path}")
\ No newline at end of file
+def render_resume_pdfs(jobs, processes=False, max_workers=None):
+    # Renders many resumes at once; jobs is an iterable of (resume, output_path). In-process by default,
+    # so the layout caches are shared across the batch; processes=True spreads the work over a
+    # process pool for large batches on multi-core machines. Returns the output paths in order,
+    # None for resumes that could not be rendered.
+    jobs = [(r.to_records() if isinstance(r, Resume) else list(r), path) for r, path in jobs]
+    if not processes or len(jobs) < 2:
+        return [_render_records(records, path) for records, path in jobs]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_records, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 4))))
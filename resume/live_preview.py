@@ -0,0 +1,37 @@
+# resume/live_preview.py
+
+import os
+import time
+from resume.generate_pdf import render_resume_pdf_bytes, resume_content_hash
+
+# Seconds the content must stay unchanged before the preview is re-rendered
+PREVIEW_DEBOUNCE = float(os.getenv("PREVIEW_DEBOUNCE", "0.8"))
+
+class LivePreview:
+    # One per session. update() is called on every rerun with the current resume: it re-renders
+    # only when the content hash differs from what is shown and has held still for `debounce`
+    # seconds, so a burst of edits costs one render. Until then the previous PDF stays on screen.
+    def __init__(self, debounce=PREVIEW_DEBOUNCE, clock=time.monotonic):
+        self.debounce = debounce
+        self.clock = clock
+        self.pdf = None
+        self.rendered_hash = None
+        self.pending_hash = None
+        self.pending_since = 0.0
+        self.renders = 0
+
+    def update(self, resume):
+        # Returns (pdf bytes or None, stale) where stale means newer edits are waiting to be rendered
+        content_hash = resume_content_hash(resume)
+        if content_hash == self.rendered_hash:
+            self.pending_hash = None
+            return self.pdf, False
+        now = self.clock()
+        if content_hash != self.pending_hash:
+            self.pending_hash, self.pending_since = content_hash, now
+        if self.pdf is not None and now - self.pending_since < self.debounce:
+            return self.pdf, True
+        self.pdf = render_resume_pdf_bytes(resume, content_hash)
+        self.rendered_hash, self.pending_hash = content_hash, None
+        self.renders += 1
+        return self.pdf, False
@@ -0,0 +1,101 @@
+# resume/page_fit.py
+
+from resume.generate_pdf import count_pages
+from utils.job_ranker import similarity_scores
+from utils.resume_model import Resume, ResumeBlock
+
+# Sections whose bullets and entries the fitter may drop; everything else is always kept
+TRIMMABLE_SECTIONS = ("professional_experience", "projects")
+
+def split_entry(content):
+    lines = [line for line in content.split("\n") if line.strip()]
+    return (lines[0], lines[1:]) if lines else ("", [])
+
+def fit_to_page(blocks, job_description="", max_pages=1, min_job_bullets=1):
+    # Trims a tailored resume until it renders on max_pages pages, using the PDF generator's own
+    # layout, so no LLM call is needed. Bullets in experience and projects and whole projects are
+    # scored by similarity to the job description. The least relevant are dropped until the resume
+    # fits, then dropped units are re-added best first wherever they still fit.
+    # Every job keeps its header and at least min_job_bullets bullets.
+    # Returns (blocks, report) where report has "pages_before", "pages" and "removed" (the dropped lines).
+    resume = blocks if isinstance(blocks, Resume) else Resume.from_records(blocks)
+    entries = []
+    for i, block in enumerate(resume):
+        if block.section in TRIMMABLE_SECTIONS and block.content.strip():
+            header, bullets = split_entry(block.content)
+            entries.append((i, block.section, header, bullets))
+
+    # Units: ("bullet", entry, bullet index) and ("project", entry, None)
+    units, texts = [], []
+    for e, (_, section, header, bullets) in enumerate(entries):
+        for b, bullet in enumerate(bullets):
+            units.append(("bullet", e, b))
+            texts.append(bullet)
+        if section == "projects":
+            units.append(("project", e, None))
+            texts.append(" ".join([header] + bullets))
+    scores = similarity_scores(job_description, texts) if job_description.strip() and texts else [0.0] * len(texts)
+    # Least relevant first; among equals, later bullets and later entries go first
+    order = sorted(range(len(units)), key=lambda u: (scores[u], -units[u][1], -(units[u][2] or 0)))
+
+    removed = set()
+
+    def build():
+        kept = {}
+        for u in range(len(units)):
+            kind, e, b = units[u]
+            if kind == "bullet" and u not in removed:
+                kept.setdefault(e, []).append(entries[e][3][b])
+        dropped_projects = {units[u][1] for u in removed if units[u][0] == "project"}
+        by_block = {entry[0]: e for e, entry in enumerate(entries)}
+        out = Resume()
+        for i, block in enumerate(resume):
+            e = by_block.get(i)
+            if e is None:
+                out.append(block)
+            elif e not in dropped_projects:
+                content = "\n".join([entries[e][2]] + kept.get(e, []))
+                out.append(ResumeBlock(block.section, block.subsection, content))
+        return out
+
+    def removable(u):
+        kind, e, _ = units[u]
+        if kind == "project":
+            return True
+        if ("project", e, None) in (units[v] for v in removed):
+            return False
+        if entries[e][1] == "projects":
+            # A project's last bullet only goes with the project itself
+            minimum = 1
+        else:
+            minimum = min_job_bullets
+        remaining = sum(1 for v in range(len(units)) if units[v][:2] == ("bullet", e) and v not in removed)
+        return remaining > minimum
+
+    pages_before = count_pages(resume)
+    pages = pages_before
+    for u in order:
+        if pages <= max_pages:
+            break
+        if removable(u):
+            removed.add(u)
+            pages = count_pages(build())
+
+    # Give back the most relevant units that still fit
+    if removed and pages <= max_pages:
+        for u in sorted(removed, key=lambda v: -scores[v]):
+            removed.discard(u)
+            if count_pages(build()) > max_pages:
+                removed.add(u)
+
+    fitted = build()
+    dropped_projects = {units[u][1] for u in removed if units[u][0] == "project"}
+    removed_lines = []
+    for u in sorted(removed):
+        kind, e, b = units[u]
+        if kind == "project":
+            removed_lines.append(entries[e][2])
+        elif e not in dropped_projects:
+            removed_lines.append(entries[e][3][b])
+    report = {"pages_before": pages_before, "pages": count_pages(fitted), "removed": removed_lines}
+    return fitted.to_records(), report
@@ -0,0 +1,73 @@
+# tests/test_batch_tailor.py
+
+import json
+import utils.resume_rewriter as rewriter
+import utils.batch_tailor as batch_tailor
+from utils.batch_tailor import tailor_jobs
+from utils.llm_backends import FakeBackend, set_backend
+from utils.ttl_cache import TTLCache
+
+MASTER_ROWS = [
+    {"section": "personal_info", "subsection": "name", "content": "Alex Smith"},
+    {"section": "professional_summary", "subsection": "summary", "content": "Analyst who builds dashboards."},
+    {"section": "professional_experience", "subsection": "job_1", "content": "**Data Analyst | Acme | 2023**\n• Built dashboards"},
+]
+
+LLM_OUTPUT = json.dumps([
+    {"section": "professional_summary", "subsection": "summary", "content": "Tailored summary."},
+    {"section": "professional_experience", "subsection": "job_1", "content": "**Data Analyst | Acme | 2023**\n• Built SQL dashboards"},
+])
+
+JOBS = [
+    {"title": "Data Analyst", "company": "Acme", "url": "https://jobs.example/acme", "description": "SQL dashboards"},
+    {"title": "BI Analyst", "company": "Globex", "url": "https://jobs.example/globex", "description": "Python reporting"},
+]
+
+def test_rerun_retries_only_failed_jobs(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rewriter, "_rewrite_cache", TTLCache(max_entries=10))
+    down = {"Globex"}
+
+    def respond(prompt):
+        if any(company in prompt for company in down):
+            raise ConnectionError("server went away")
+        return LLM_OUTPUT
+
+    backend = FakeBackend(respond)
+    previous = set_backend(backend)
+    try:
+        out_dir = str(tmp_path / "batch")
+        first = tailor_jobs(JOBS, MASTER_ROWS, out_dir=out_dir, max_workers=2, make_pdf=False)
+        assert [o["status"] for o in first] == ["done", "failed"]
+
+        down.clear()
+        backend.prompts.clear()
+        second = tailor_jobs(JOBS, MASTER_ROWS, out_dir=out_dir, max_workers=2, make_pdf=False)
+        assert [o["status"] for o in second] == ["done", "done"]
+        assert len(backend.prompts) == 1 and "Globex" in backend.prompts[0]
+
+        # A changed option makes the finished entries stale, so both jobs are written again
+        third = tailor_jobs(JOBS, MASTER_ROWS, out_dir=out_dir, max_workers=2, make_pdf=False, fit_page=True)
+        assert [o["status"] for o in third] == ["done", "done"]
+        assert all(o["inputs"] != first[0]["inputs"] for o in third)
+    finally:
+        set_backend(previous)
+
+def test_partial_rewrites_are_retried_and_duplicates_run_once(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_rewriter(job_description, resume_rows, force_regenerate=False):
+        calls.append(job_description)
+        failed = {"summary": "model unavailable"} if len(calls) == 1 else {}
+        return {"rewritten_blocks": json.loads(LLM_OUTPUT), "cached": False, "failed_sections": failed}
+
+    monkeypatch.setattr(batch_tailor, "full_resume_rewriter", fake_rewriter)
+    out_dir = str(tmp_path / "batch")
+    first = tailor_jobs([JOBS[0], dict(JOBS[0])], MASTER_ROWS, out_dir=out_dir, max_workers=2, make_pdf=False)
+    assert len(calls) == 1
+    assert [o["status"] for o in first] == ["partial", "partial"]
+    assert first[0]["failed_sections"] == ["summary"]
+
+    second = tailor_jobs([JOBS[0]], MASTER_ROWS, out_dir=out_dir, max_workers=2, make_pdf=False)
+    assert len(calls) == 2
+    assert second[0]["status"] == "done" and second[0]["failed_sections"] == []
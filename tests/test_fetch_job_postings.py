@@ -0,0 +1,121 @@
+# tests/test_fetch_job_postings.py
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+import mcp_server.server as server
+import mcp_server.tools.fetch_job_postings as fetch
+from utils.ttl_cache import TTLCache
+
+def test_batch_keeps_same_query_on_different_sources(monkeypatch):
+    async def fake_fetch(query, location="San Diego", results_per_page=10, posted_within="Any time", source="adzuna"):
+        job = {"title": f"{query} ({source})", "company": source, "location": location, "url": f"https://{source}.example/1", "description": source}
+        return {"query": query, "location": location, "results": [job]}
+
+    monkeypatch.setattr(fetch, "fetch_job_postings_async", fake_fetch)
+    with TestClient(server.app) as client:
+        response = client.post("/tools/fetch_job_postings/batch_invoke", json={"queries": [
+            {"query": "Data Analyst", "source": "adzuna"},
+            {"query": "Data Analyst", "source": "jsearch"},
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert list(data["results"]) == ["Data Analyst", "jsearch:Data Analyst"]
+        assert sorted(job["company"] for job in data["jobs"]) == ["adzuna", "jsearch"]
+        assert data["duplicates_removed"] == 0
+
+        response = client.post("/tools/fetch_job_postings/batch_invoke", json={"queries": [
+            {"query": "Data Analyst", "label": "Analyst"},
+            {"query": "Data Scientist", "label": "Analyst"},
+        ]})
+        assert response.status_code == 400
+
+class FakeAdzuna:
+    # Stands in for the shared httpx client; pages maps page number -> list of "created" timestamps
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    async def get(self, url, params=None, headers=None):
+        page = int(url.rsplit("/", 1)[1])
+        self.requested.append(page)
+        results = [
+            {"title": f"Job {page}-{i}", "company": {"display_name": f"Co {page}-{i}"}, "redirect_url": f"https://jobs.example/{page}/{i}", "created": created}
+            for i, created in enumerate(self.pages.get(page, []))
+        ]
+        return FakeResponse({"results": results})
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+def days_ago(days):
+    return (datetime.utcnow() - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def stream(**payload):
+    async def collect():
+        return [item async for item in fetch.stream_job_postings(**payload)]
+    return asyncio.run(collect())
+
+def use_fake_adzuna(monkeypatch, pages):
+    client = FakeAdzuna(pages)
+    monkeypatch.setattr(fetch, "get_async_client", lambda: client)
+    monkeypatch.setattr(fetch, "store_jobs", lambda jobs, source: None)
+    monkeypatch.setattr(fetch, "job_cache", TTLCache(max_entries=10))
+    monkeypatch.setattr(fetch, "APP_ID", "id")
+    monkeypatch.setattr(fetch, "APP_KEY", "key")
+    monkeypatch.setattr(fetch, "PAGE_SIZES", {"adzuna": 2, "jsearch": 2})
+    monkeypatch.setattr(fetch, "JOB_PAGE_CONCURRENCY", 1)
+    return client
+
+def test_paginator_stops_early(monkeypatch):
+    # A short page is the last one
+    client = use_fake_adzuna(monkeypatch, {1: [days_ago(0), days_ago(1)], 2: [days_ago(2)], 3: [days_ago(3), days_ago(3)]})
+    assert len(stream(query="analyst", results_per_page=10)) == 3
+    assert client.requested == [1, 2]
+
+    # So is a page that lost jobs to the date filter, since pages are date ordered
+    client = use_fake_adzuna(monkeypatch, {1: [days_ago(1), days_ago(2)], 2: [days_ago(5), days_ago(20)], 3: [days_ago(3), days_ago(3)]})
+    assert len(stream(query="analyst", results_per_page=10, posted_within="Past week")) == 3
+    assert client.requested == [1, 2]
+
+    # And nothing past results_per_page is fetched or yielded
+    client = use_fake_adzuna(monkeypatch, {page: [days_ago(page), days_ago(page)] for page in range(1, 6)})
+    jobs = stream(query="analyst", results_per_page=3)
+    assert [job["title"] for job in jobs] == ["Job 1-0", "Job 1-1", "Job 2-0"]
+    assert client.requested == [1, 2]
+
+def test_stream_is_served_from_job_cache(monkeypatch):
+    client = use_fake_adzuna(monkeypatch, {1: [days_ago(0), days_ago(1)], 2: [days_ago(2)]})
+    first = stream(query="analyst", results_per_page=10)
+    second = stream(query="  Analyst ", results_per_page=10)
+    assert second == first
+    assert client.requested == [1, 2]
+    assert fetch.job_cache.stats()["hits"] == 1
+
+    # The non-streaming endpoint shares the entry
+    result = asyncio.run(fetch.fetch_job_postings_async(query="analyst", results_per_page=10))
+    assert result["results"] == first
+    assert client.requested == [1, 2]
+
+def test_job_store_writes_run_off_the_event_loop(monkeypatch):
+    use_fake_adzuna(monkeypatch, {1: [days_ago(0), days_ago(1)], 2: [days_ago(2)]})
+    writers = []
+    monkeypatch.setattr(fetch, "store_jobs", lambda jobs, source: writers.append((threading.get_ident(), len(jobs), source)))
+
+    async def run():
+        loop_thread = threading.get_ident()
+        jobs = [item async for item in fetch.stream_job_postings(query="analyst", results_per_page=10)]
+        return loop_thread, jobs
+
+    loop_thread, jobs = asyncio.run(run())
+    assert len(jobs) == 3
+    assert [(count, source) for _, count, source in writers] == [(2, "adzuna"), (1, "adzuna")]
+    assert all(thread != loop_thread for thread, _, _ in writers)
@@ -0,0 +1,45 @@
+# tests/test_generate_pdf.py
+
+import resume.generate_pdf as generate_pdf
+from resume.generate_pdf import BOLD_FONT, NORMAL_FONT, layout_block, render_resume_pdfs
+from utils.ttl_cache import TTLCache
+from utils.resume_model import Resume
+
+ROWS = [
+    {"section": "personal_info", "subsection": "name", "content": "Alex Smith"},
+    {"section": "personal_info", "subsection": "target_roles", "content": "Data Analyst | Data Analyst | BI Developer"},
+    {"section": "professional_experience", "subsection": "job_1", "content": "**Data Analyst | Acme | 2023**\n• Built dashboards"},
+]
+
+def test_layout_splits_bold_runs_and_wraps_long_lines():
+    lines = layout_block("**Data Analyst** at Acme\n" + "word " * 60)
+    assert [(text, font) for _, text, font in lines[0]] == [("Data Analyst", BOLD_FONT), (" at Acme", NORMAL_FONT)]
+    assert lines[0][1][0] > 0
+    assert len(lines) > 2
+
+def test_batch_render_writes_pdfs_and_skips_incomplete_resumes(tmp_path):
+    paths = render_resume_pdfs([
+        (ROWS, str(tmp_path / "a.pdf")),
+        (Resume.from_records(ROWS), str(tmp_path / "b.pdf")),
+        (ROWS[2:], str(tmp_path / "c.pdf")),
+    ])
+    assert paths == [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf"), None]
+    assert (tmp_path / "a.pdf").read_bytes().startswith(b"%PDF")
+    assert not (tmp_path / "c.pdf").exists()
+
+def test_pdf_bytes_are_rendered_in_memory_and_cached_by_content(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(generate_pdf, "_pdf_cache", TTLCache(max_entries=4))
+    renders = []
+    real_render = generate_pdf.render_resume_pdf
+    monkeypatch.setattr(generate_pdf, "render_resume_pdf", lambda resume, out: renders.append(out) or real_render(resume, out))
+
+    first = generate_pdf.render_resume_pdf_bytes(ROWS)
+    again = generate_pdf.render_resume_pdf_bytes(Resume.from_records([dict(r) for r in ROWS]))
+    changed = generate_pdf.render_resume_pdf_bytes(ROWS[:2])
+
+    assert first.startswith(b"%PDF") and again is first
+    assert changed is not None and changed != first
+    assert len(renders) == 2
+    assert generate_pdf.render_resume_pdf_bytes(ROWS[2:]) is None
+    assert list(tmp_path.iterdir()) == []
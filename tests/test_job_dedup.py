@@ -0,0 +1,30 @@
+# tests/test_job_dedup.py
+
+from utils.job_dedup import JobDeduplicator, dedupe_jobs
+
+DESCRIPTION = (
+    "We are looking for a data analyst to build Tableau dashboards, write SQL against our warehouse, "
+    "partner with finance on forecasting and present insights to leadership every quarter."
+)
+
+def test_exact_url_duplicates_are_merged_with_labels():
+    dedup = JobDeduplicator()
+    assert dedup.add({"title": "Data Analyst", "company": "Acme", "url": "https://x/1", "search_label": "Data Analyst"})
+    assert not dedup.add({"title": "Data Analyst", "company": "Acme", "url": "https://x/1", "search_label": "BI Analyst"})
+    assert len(dedup.jobs) == 1
+    assert dedup.jobs[0]["search_labels"] == ["Data Analyst", "BI Analyst"]
+    assert dedup.jobs[0]["duplicates"] == 1
+
+def test_near_duplicates_across_sources_are_merged():
+    adzuna = {"title": "Data Analyst", "company": "Acme Corp", "url": "https://adzuna/1", "description": DESCRIPTION[:150] + "..."}
+    jsearch = {"title": "Data Analyst", "company": "ACME Corp.", "url": "https://jsearch/9", "description": DESCRIPTION + " Benefits include remote work."}
+    other = {"title": "Machine Learning Engineer", "company": "Acme Corp", "url": "https://adzuna/2", "description": "Train and deploy PyTorch models."}
+    unique = dedupe_jobs([adzuna, jsearch, other])
+    assert [job["url"] for job in unique] == ["https://adzuna/1", "https://adzuna/2"]
+
+def test_many_distinct_jobs_are_kept():
+    jobs = [
+        {"title": f"Role {i}", "company": f"Company {i}", "url": f"https://x/{i}", "description": f"Unique duties {i} for team {i * 7} in city {i * 13}"}
+        for i in range(2000)
+    ]
+    assert len(dedupe_jobs(jobs)) == 2000
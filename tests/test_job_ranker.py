@@ -0,0 +1,49 @@
+# tests/test_job_ranker.py
+
+import os
+from utils.job_ranker import ResumeMatcher, get_resume_matcher, rank_jobs
+from utils.profile_store import get_profile_store
+
+RESUME_ROWS = [
+    {"section": "personal_info", "subsection": "email", "content": "someone@example.com"},
+    {"section": "personal_info", "subsection": "target_roles", "content": "Data Analyst | BI Consultant"},
+    {"section": "technical_skills", "subsection": "programming_languages", "content": "Python | SQL | Tableau | Power BI"},
+    {"section": "professional_experience", "subsection": "job_1", "content": "**Data Analyst | Acme | 2023**\n• Built Tableau dashboards and SQL pipelines"},
+]
+
+def test_rank_jobs_orders_by_resume_similarity():
+    matcher = ResumeMatcher(RESUME_ROWS)
+    jobs = [
+        {"title": "Registered Nurse", "description": "Patient care in a hospital setting."},
+        {"title": "Data Analyst", "description": "Write SQL and build Tableau dashboards for the BI team."},
+        {"title": "Python Developer", "description": "Maintain Python services."},
+    ]
+    ranked = rank_jobs(jobs, matcher)
+    assert [job["title"] for job in ranked] == ["Data Analyst", "Python Developer", "Registered Nurse"]
+    assert ranked[-1]["relevance"] == 0
+    assert 0 < ranked[0]["relevance"] <= 1
+
+def test_matcher_is_cached_until_resume_changes(tmp_path):
+    path = tmp_path / "demo_master_resume.csv"
+    path.write_text("section,subsection,content\ntechnical_skills,tools,Python | SQL\n")
+    first = get_resume_matcher("demo", user_dir=str(tmp_path))
+    assert get_resume_matcher("demo", user_dir=str(tmp_path)) is first
+    assert get_resume_matcher("missing", user_dir=str(tmp_path)) is None
+
+    # Once the store sees the rewritten file, the matcher is rebuilt from it
+    get_profile_store(str(tmp_path)).check_interval = 0
+    path.write_text("section,subsection,content\ntechnical_skills,tools,Nursing | Phlebotomy\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = get_resume_matcher("demo", user_dir=str(tmp_path))
+    assert second is not first
+    assert second.score_texts(["phlebotomy nurse"])[0] > 0
+    assert first.score_texts(["phlebotomy nurse"])[0] == 0
+
+def test_rank_jobs_without_matcher_puts_newest_first():
+    jobs = [
+        {"title": "Old", "created": "2025-01-02T00:00:00Z"},
+        {"title": "Undated"},
+        {"title": "New", "created": "2025-03-01T00:00:00Z"},
+    ]
+    assert [job["title"] for job in rank_jobs(jobs)] == ["New", "Old", "Undated"]
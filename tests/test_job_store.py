@@ -0,0 +1,25 @@
+# tests/test_job_store.py
+
+from mcp_server.tools.job_store import JobStore
+
+def make_job(url, title, created="2025-06-01T12:00:00Z", description=""):
+    return {"title": title, "company": "Acme", "location": "San Diego, CA", "url": url, "created": created, "description": description}
+
+def test_upsert_is_keyed_by_url():
+    store = JobStore(":memory:")
+    store.upsert_jobs([make_job("https://a", "Data Analyst")], "adzuna")
+    store.upsert_jobs([make_job("https://a", "Senior Data Analyst")], "adzuna")
+    assert store.count() == 1
+    assert store.search_jobs("senior")[0]["title"] == "Senior Data Analyst"
+
+def test_full_text_search_filters_and_sorts():
+    store = JobStore(":memory:")
+    store.upsert_jobs([
+        make_job("https://a", "Data Analyst", "2025-06-01T12:00:00Z", "SQL and Tableau dashboards"),
+        make_job("https://b", "ML Engineer", "2025-06-03T12:00:00Z", "PyTorch models and SQL"),
+        make_job("https://c", "Nurse", "2025-06-02T12:00:00Z", "Patient care"),
+    ], "jsearch")
+    assert [j["url"] for j in store.search_jobs("sql")] == ["https://b", "https://a"]
+    assert [j["url"] for j in store.search_jobs("tableau sql")] == ["https://a"]
+    assert store.search_jobs("sql", location="Boston") == []
+    assert store.search_jobs("\"unbalanced (", limit=5) == []
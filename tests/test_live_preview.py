@@ -0,0 +1,38 @@
+# tests/test_live_preview.py
+
+import resume.generate_pdf as generate_pdf
+from resume.live_preview import LivePreview
+from utils.ttl_cache import TTLCache
+
+ROWS = [
+    {"section": "personal_info", "subsection": "name", "content": "Alex Smith"},
+    {"section": "personal_info", "subsection": "target_roles", "content": "Data Analyst"},
+    {"section": "projects", "subsection": "proj_1", "content": "**Churn model**\n• Cut churn 8%"},
+]
+
+def test_preview_rerenders_once_edits_settle(monkeypatch):
+    monkeypatch.setattr(generate_pdf, "_pdf_cache", TTLCache(max_entries=8))
+    clock = [0.0]
+    preview = LivePreview(debounce=1.0, clock=lambda: clock[0])
+
+    first, stale = preview.update(ROWS)
+    assert first.startswith(b"%PDF") and not stale
+    assert preview.update(ROWS) == (first, False)
+
+    # A burst of edits keeps showing the last render until the content holds still
+    edited = ROWS[:2] + [{"section": "projects", "subsection": "proj_1", "content": "**Churn model v2**"}]
+    clock[0] = 0.5
+    assert preview.update(edited) == (first, True)
+    clock[0] = 1.2
+    assert preview.update(edited) == (first, True)
+    clock[0] = 1.6
+    latest, stale = preview.update(edited)
+    assert latest != first and not stale
+    assert preview.renders == 2
+
+def test_unchanged_sections_reuse_their_layout():
+    generate_pdf.layout_section.cache_clear()
+    generate_pdf.render_resume_pdf_bytes(ROWS)
+    generate_pdf.render_resume_pdf_bytes(ROWS[:2] + [ROWS[2], {"section": "personal_info", "subsection": "email", "content": "a@b.co"}])
+    info = generate_pdf.layout_section.cache_info()
+    assert info.hits == 1 and info.misses == 1
@@ -0,0 +1,115 @@
+# tests/test_llm_backends.py
+
+import threading
+import time
+import requests
+import utils.resume_rewriter as rewriter
+from utils.llm_backends import BackendPool, FakeBackend, LLMBackend, set_backend
+from utils.ttl_cache import TTLCache
+
+MASTER_ROWS = [
+    {"section": "professional_summary", "subsection": "summary", "content": "Analyst who builds dashboards."},
+]
+LLM_OUTPUT = '[{"section": "professional_summary", "subsection": "summary", "content": "Tailored summary."}]'
+
+class FlakyBackend(LLMBackend):
+    name = "flaky"
+
+    def __init__(self, failures, **kwargs):
+        super().__init__("flaky", backoff=0, **kwargs)
+        self.failures = failures
+        self.calls = 0
+
+    def _generate(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise requests.ConnectionError("connection refused")
+        return "ok"
+
+    def _stream(self, prompt):
+        self.calls += 1
+        yield "partial"
+        raise requests.ConnectionError("connection reset")
+
+def test_retries_connection_errors_then_gives_up():
+    assert FlakyBackend(failures=2, max_retries=2).generate("hi") == "ok"
+
+    backend = FlakyBackend(failures=5, max_retries=1)
+    try:
+        backend.generate("hi")
+        raise AssertionError("expected ConnectionError")
+    except requests.ConnectionError:
+        assert backend.calls == 2
+
+    # A stream that already produced tokens is not replayed
+    backend = FlakyBackend(failures=0, max_retries=3)
+    tokens = []
+    try:
+        for token in backend.stream("hi"):
+            tokens.append(token)
+    except requests.ConnectionError:
+        pass
+    assert tokens == ["partial"] and backend.calls == 1
+
+def test_concurrency_limit_is_per_backend():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow(prompt):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return prompt
+
+    backend = FakeBackend(slow, max_concurrency=2)
+    threads = [threading.Thread(target=backend.generate, args=(str(i),)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2 and len(backend.prompts) == 6
+
+def test_rewriter_runs_on_fake_backend(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rewriter, "_rewrite_cache", TTLCache(max_entries=10))
+    backend = FakeBackend(LLM_OUTPUT)
+    previous = set_backend(backend)
+    try:
+        tokens = []
+        result = rewriter.full_resume_rewriter("Data analyst role", MASTER_ROWS, on_token=tokens.append)
+    finally:
+        set_backend(previous)
+
+    assert "".join(tokens) == LLM_OUTPUT
+    assert len(backend.prompts) == 1
+    summary = [b for b in result["rewritten_blocks"] if b["section"] == "professional_summary"]
+    assert summary[0]["content"] == "Tailored summary."
+
+class DownBackend(FakeBackend):
+    def _generate(self, prompt):
+        super()._generate(prompt)
+        raise requests.ConnectionError("connection refused")
+
+def test_pool_prefers_least_outstanding_and_fails_over():
+    clock = [0.0]
+    a, b = FakeBackend("a"), FakeBackend("b")
+    pool = BackendPool([a, b], cooldown=30, clock=lambda: clock[0])
+    with pool._lock:
+        pool._state[0]["outstanding"] = 1
+    assert pool.generate("x") == "b"
+
+    down = DownBackend("down")
+    pool = BackendPool([down, a], cooldown=30, clock=lambda: clock[0])
+    assert [pool.generate("x") for _ in range(3)] == ["a", "a", "a"]
+    assert len(down.prompts) == 1
+    stats = pool.stats()
+    assert stats[0]["healthy"] is False and stats[0]["failures"] == 1
+    assert stats[1]["requests"] == 3 and stats[1]["outstanding"] == 0
+
+    # After the cooldown the endpoint gets traffic again
+    clock[0] = 31
+    pool.generate("x")
+    assert len(down.prompts) == 2
@@ -0,0 +1,38 @@
+# tests/test_page_fit.py
+
+from resume.generate_pdf import count_pages
+from resume.page_fit import fit_to_page
+
+def long_resume():
+    rows = [
+        {"section": "personal_info", "subsection": "name", "content": "Alex Smith"},
+        {"section": "personal_info", "subsection": "target_roles", "content": "Data Analyst"},
+        {"section": "professional_summary", "subsection": "summary", "content": "Analyst. " * 40},
+    ]
+    for j in range(3):
+        bullets = [f"• Built SQL dashboards and forecasting models for team {j}"]
+        bullets += [f"• Organised the office party and the coffee rota, year {k}" for k in range(8)]
+        rows.append({"section": "professional_experience", "subsection": f"job_{j+1}", "content": "\n".join([f"**Analyst | Co {j} | 2020**"] + bullets)})
+    for p in range(6):
+        rows.append({"section": "projects", "subsection": f"proj_{p+1}", "content": f"**Garden Project {p}**\n• Planted tomatoes and watered them daily\n• Built a shed"})
+    rows.append({"section": "projects", "subsection": "proj_7", "content": "**Sales Forecast**\n• SQL and Python forecasting dashboards"})
+    return rows
+
+def test_fit_drops_least_relevant_lines_until_one_page():
+    rows = long_resume()
+    assert count_pages(rows) > 1
+
+    fitted, report = fit_to_page(rows, "Data analyst: SQL dashboards, Python forecasting models")
+
+    assert report["pages_before"] > 1 and report["pages"] == 1 == count_pages(fitted)
+    contents = "\n".join(r["content"] for r in fitted)
+    assert contents.count("Built SQL dashboards and forecasting models") == 3
+    assert "**Sales Forecast**" in contents
+    assert report["removed"] and all("SQL" not in line for line in report["removed"])
+    jobs = [r for r in fitted if r["section"] == "professional_experience"]
+    assert len(jobs) == 3 and all(len(j["content"].split("\n")) >= 2 for j in jobs)
+
+def test_resume_that_already_fits_is_untouched():
+    rows = long_resume()[:4]
+    fitted, report = fit_to_page(rows, "anything")
+    assert fitted == rows and report == {"pages_before": 1, "pages": 1, "removed": []}
@@ -0,0 +1,42 @@
+# tests/test_profile_store.py
+
+import json
+import os
+from utils.profile_loader import load_user_profile
+from utils.profile_store import ProfileStore
+
+def test_profiles_are_cached_until_the_file_changes(tmp_path):
+    clock = [0.0]
+    store = ProfileStore(str(tmp_path), check_interval=2, clock=lambda: clock[0])
+    path = tmp_path / "alex.json"
+    path.write_text(json.dumps({"name": "Alex"}))
+
+    assert store.get_profile("alex") == {"name": "Alex"}
+    assert store.get_profile("alex") == {"name": "Alex"} and store.loads == 1
+
+    path.write_text(json.dumps({"name": "Alexandra"}))
+    os.utime(path, ns=(1, 1))
+    # Within the check interval the cached copy is served without touching the file
+    assert store.get_profile("alex") == {"name": "Alex"}
+    clock[0] = 3
+    assert store.get_profile("alex") == {"name": "Alexandra"} and store.loads == 2
+    assert store.get_profile("nobody") == {}
+
+def test_writes_through_the_store_are_seen_immediately(tmp_path):
+    store = ProfileStore(str(tmp_path), check_interval=60)
+    assert store.list_profiles() == [] and store.get_master_resume("alex") is None
+
+    store.save_profile("alex", {"name": "Alex"})
+    store.set_active_profile("alex")
+    raw = b"section,subsection,content,notes\r\n\"personal_info\",name,Alex,kept\r\n"
+    store.save_master_resume("alex", raw)
+
+    assert store.list_profiles() == ["alex"]
+    assert store.get_master_resume("alex").get("personal_info", "name") == "Alex"
+    assert store.get_master_resume("alex") is store.get_master_resume("alex")
+    assert store.get_master_resume_bytes("alex") == raw
+
+def test_load_user_profile_accepts_name_or_path(tmp_path):
+    (tmp_path / "jamie.json").write_text(json.dumps({"name": "Jamie"}))
+    assert load_user_profile(str(tmp_path / "jamie.json")) == {"name": "Jamie"}
+    assert load_user_profile("jamie_lee") == load_user_profile("users/jamie_lee.json") != {}
@@ -0,0 +1,37 @@
+# tests/test_resume_model.py
+
+import io
+from utils.resume_model import Resume, ResumeBlock
+
+CSV_TEXT = (
+    "section,subsection,content\n"
+    "personal_info,name,Alex Smith\n"
+    "personal_info,github,\n"
+    "professional_experience,job_1,\"**Data Analyst | Acme | 2023**\n• Built dashboards\"\n"
+    "professional_experience,job_2,**Intern | Beta | 2021**\n"
+    "professional_experience,job_1,• Automated reports\n"
+)
+
+def test_csv_round_trip_and_lookups():
+    resume = Resume.from_csv(io.BytesIO(CSV_TEXT.encode("utf-8")))
+
+    assert len(resume) == 5
+    assert resume.get("personal_info", "name") == "Alex Smith"
+    assert resume.get("personal_info", "github") == ""
+    assert resume.get("personal_info", "phone", None) is None
+    assert ("personal_info", "name") in resume
+    assert [b.subsection for b in resume.section("professional_experience")] == ["job_1", "job_2", "job_1"]
+    assert Resume.from_csv(io.StringIO(resume.to_csv())).to_records() == resume.to_records()
+
+def test_grouped_merges_rows_sharing_a_subsection():
+    resume = Resume.from_csv(io.StringIO(CSV_TEXT))
+    assert resume.grouped("professional_experience") == [
+        ("job_1", ["**Data Analyst | Acme | 2023**", "• Built dashboards", "• Automated reports"]),
+        ("job_2", ["**Intern | Beta | 2021**"]),
+    ]
+    assert resume.grouped("projects") == []
+
+def test_records_with_missing_values_become_empty_strings():
+    resume = Resume.from_records([{"section": "projects", "subsection": None, "content": float("nan")}])
+    assert resume.blocks == [ResumeBlock("projects", "", "")]
+    assert list(resume.to_dataframe().columns) == ["section", "subsection", "content"]
@@ -0,0 +1,166 @@
+# tests/test_resume_rewriter.py
+
+import json
+import utils.resume_rewriter as rewriter
+from utils.ttl_cache import TTLCache
+from utils.llm_output_parser import ResumeOutputParser, parse_llm_output
+
+MASTER_ROWS = [
+    {"section": "personal_info", "subsection": "name", "content": "Alex Smith"},
+    {"section": "professional_summary", "subsection": "summary", "content": "Analyst who builds dashboards."},
+    {"section": "technical_skills", "subsection": "programming_languages", "content": "Python | SQL"},
+    {"section": "professional_experience", "subsection": "job_1", "content": "**Data Analyst | Acme | 2023**\n• Built dashboards"},
+]
+
+LLM_OUTPUT = json.dumps([
+    {"section": "professional_summary", "subsection": "summary", "content": "Tailored summary."},
+    {"section": "technical_skills", "subsection": "programming_languages", "content": ["SQL", "Python"]},
+    {"section": "professional_experience", "subsection": {"title": "Data Analyst", "company": "Acme", "dates": "2023", "responsibilities": ["Built SQL dashboards"]}},
+])
+
+# What llama3 actually sends back: loose CSV with unquoted commas and multi-line blocks
+CSV_OUTPUT = """Here is the rewritten resume:
+
+section,subsection,content
+professional_summary,summary,Analyst focused on SQL, dashboards and forecasting.
+technical_skills,programming_languages,SQL | Python
+
+professional_experience,role1,**Data Analyst | Acme | 2023**
+• Built SQL dashboards
+• Forecast demand
+"""
+
+def test_rewrite_cache_skips_llm_until_forced(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rewriter, "_rewrite_cache", TTLCache(max_entries=10))
+    monkeypatch.setattr(rewriter, "run_ollama", lambda prompt, on_token=None: calls.append(prompt) or LLM_OUTPUT)
+
+    first = rewriter.full_resume_rewriter("Data analyst role", MASTER_ROWS)
+    second = rewriter.full_resume_rewriter("  Data analyst   role ", MASTER_ROWS)
+    forced = rewriter.full_resume_rewriter("Data analyst role", MASTER_ROWS, force_regenerate=True)
+
+    assert len(calls) == 2
+    assert not first["cached"] and second["cached"] and not forced["cached"]
+    assert second["rewritten_blocks"] == first["rewritten_blocks"]
+    summary = [b for b in first["rewritten_blocks"] if b["section"] == "professional_summary"]
+    assert summary[0]["content"] == "Tailored summary."
+
+def test_prompt_keeps_relevant_blocks_within_budget():
+    blocks = rewriter.format_resume_rows(MASTER_ROWS + [
+        {"section": "projects", "subsection": f"proj_{i}", "content": f"**Pottery Project {i}**\n• Glazed ceramic vases"}
+        for i in range(30)
+    ] + [
+        {"section": "projects", "subsection": "ml", "content": "**Churn Model**\n• Trained a Python churn classifier on SQL data"},
+    ])
+    selected = rewriter.select_relevant_blocks("Python SQL data analyst building churn models", blocks, token_budget=150)
+    projects = [b["subsection"] for b in selected if b["section"] == "projects"]
+
+    assert "ml" in projects
+    assert len(projects) <= rewriter.RANKED_MINIMUMS["projects"]
+    assert not any(b["section"] == "personal_info" and b["subsection"] == "name" for b in selected)
+    assert rewriter.estimate_tokens(rewriter.serialize_blocks(selected)) <= 150 + len(selected)
+
+def test_prompt_budget_covers_fixed_sections():
+    certifications = "\n".join(f"• Certified Cloud Practitioner Level {i}, Example Institute" for i in range(60))
+    blocks = rewriter.format_resume_rows(MASTER_ROWS + [
+        {"section": "certifications", "subsection": "certs", "content": certifications},
+    ])
+    selected = rewriter.select_relevant_blocks("Python SQL data analyst", blocks, token_budget=200)
+    certs = [b for b in selected if b["section"] == "certifications"]
+
+    assert rewriter.estimate_tokens(rewriter.serialize_blocks(selected)) <= 200 + len(selected)
+    assert certs and certifications.startswith(certs[0]["content"])
+    assert len(certs[0]["content"].split("\n")) < 60
+
+def test_sectioned_rewrite_keeps_master_job_when_its_section_fails(monkeypatch):
+    monkeypatch.setattr(rewriter, "_rewrite_cache", TTLCache(max_entries=10))
+
+    def fake_llm(prompt, on_token=None):
+        if "one job" in prompt:
+            raise RuntimeError("model unavailable")
+        example = prompt.split("shaped like this example:\n\n")[1].split("\n")[0]
+        return example.replace("[2-3 sentences]", "Section summary.")
+
+    monkeypatch.setattr(rewriter, "run_ollama", fake_llm)
+    result = rewriter.full_resume_rewriter("Data analyst role", MASTER_ROWS, mode="sectioned")
+    blocks = {(b["section"], b["subsection"]): b["content"] for b in result["rewritten_blocks"]}
+
+    assert list(result["failed_sections"]) == ["job_1"]
+    assert blocks[("professional_summary", "summary")] == "Section summary."
+    assert blocks[("professional_experience", "job_1")].startswith("**Data Analyst | Acme | 2023**\n• Built dashboards")
+    assert not result["cached"]
+
+def test_parser_recovers_csv_blocks_from_streamed_tokens():
+    parser = ResumeOutputParser()
+    streamed = []
+    for i in range(0, len(CSV_OUTPUT), 5):
+        streamed += parser.feed(CSV_OUTPUT[i:i + 5])
+    streamed += parser.close()
+
+    assert streamed == parse_llm_output(CSV_OUTPUT)
+    assert [b["subsection"] for b in streamed] == ["summary", "programming_languages", "role1"]
+    assert streamed[0]["content"] == "Analyst focused on SQL, dashboards and forecasting."
+    assert streamed[2]["content"] == "**Data Analyst | Acme | 2023**\n• Built SQL dashboards\n• Forecast demand"
+
+def test_parser_keeps_complete_json_blocks_from_truncated_output():
+    truncated = "Sure!\n" + LLM_OUTPUT[:-1] + ', {"section": "projects", "subsection": {"title": "Chur'
+    blocks = parse_llm_output(truncated)
+    assert [b["section"] for b in blocks] == ["professional_summary", "technical_skills", "professional_experience"]
+
+def test_parser_finds_json_on_the_preamble_line(monkeypatch):
+    inline = "Sure! Here it is: " + LLM_OUTPUT
+    parser = ResumeOutputParser()
+    streamed = []
+    for i in range(0, len(inline), 3):
+        streamed += parser.feed(inline[i:i + 3])
+    streamed += parser.close()
+    assert streamed == parse_llm_output(inline) == parse_llm_output(LLM_OUTPUT)
+    assert parse_llm_output("Here is the resume [tailored]:\n" + CSV_OUTPUT) == parse_llm_output(CSV_OUTPUT)
+
+    # A truncated section answer keeps its complete blocks instead of being retried
+    calls = []
+    monkeypatch.setattr(rewriter, "run_ollama", lambda prompt, on_token=None: calls.append(prompt) or inline[:-40])
+    blocks = rewriter.rewrite_section("summary", "prompt")
+    assert len(calls) == 1
+    assert blocks[0]["content"] == "Tailored summary."
+
+def test_only_missing_sections_are_regenerated(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(rewriter, "_rewrite_cache", TTLCache(max_entries=10))
+    prompts = []
+
+    def fake_llm(prompt, on_token=None):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            return CSV_OUTPUT.split("technical_skills")[0]
+        return prompt.split("shaped like this example:\n\n")[1].split("\n")[0].replace("Skill", "Regenerated")
+
+    monkeypatch.setattr(rewriter, "run_ollama", fake_llm)
+    result = rewriter.full_resume_rewriter("Data analyst role", MASTER_ROWS)
+    blocks = {(b["section"], b["subsection"]): b["content"] for b in result["rewritten_blocks"]}
+
+    assert result["regenerated_sections"] == ["technical_skills", "professional_experience"]
+    assert len(prompts) == 3
+    assert blocks[("professional_summary", "summary")] == "Analyst focused on SQL, dashboards and forecasting."
+    assert blocks[("technical_skills", "programming_languages")] == "Regenerated | Regenerated"
+
+def test_enforce_all_guidelines_applies_section_rules():
+    llm_blocks = rewriter.normalize_ollama_blocks([
+        {"section": "experience", "subsection": [{"title": "Analyst", "company": "Acme", "dates": ["2022", "2024"], "responsibilities": ["Built SQL dashboards"]}]},
+        {"section": "certification", "content": {"name": "AWS Cloud Practitioner", "date": "2023"}},
+        {"section": "personal_info", "subsection": "name", "content": "Not From The LLM"},
+    ])
+    master = MASTER_ROWS + [{"section": "education", "subsection": "edu_1", "content": "**BSc | State U | 2019**"}]
+    blocks = rewriter.enforce_all_guidelines(llm_blocks, master)
+    by_key = {(b["section"], b["subsection"]): b["content"] for b in blocks}
+
+    assert by_key[("personal_info", "name")] == "Alex Smith"
+    assert by_key[("certifications", "cert_1")] == "AWS Cloud Practitioner | 2023"
+    assert by_key[("education", "edu_1")] == "**BSc | State U | 2019**"
+    # LLM jobs come first, then master jobs; every job is padded to its bullet count and blanks fill to three
+    assert by_key[("professional_experience", "job_1")].split("\n")[:2] == ["**Analyst | Acme | 2022 2024**", "• Built SQL dashboards"]
+    assert len(by_key[("professional_experience", "job_1")].split("\n")) == 5
+    assert by_key[("professional_experience", "job_2")].startswith("**Data Analyst | Acme | 2023**\n• Built dashboards")
+    assert by_key[("professional_experience", "job_3")] == ""
+    assert [b["section"] for b in blocks].index("education") > [b["section"] for b in blocks].index("professional_experience")
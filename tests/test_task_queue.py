@@ -0,0 +1,62 @@
+# tests/test_task_queue.py
+
+import asyncio
+import time
+import threading
+from fastapi.testclient import TestClient
+import mcp_server.server as server
+from mcp_server.task_queue import TaskQueue
+
+def wait_for(client, task_id):
+    for _ in range(100):
+        task = client.get(f"/tasks/{task_id}").json()
+        if task["status"] in ("done", "failed"):
+            return task
+        time.sleep(0.02)
+    raise AssertionError("task did not finish")
+
+def test_submit_then_poll_result(monkeypatch):
+    def fake_rewriter(job_description, resume_rows):
+        if not resume_rows:
+            raise ValueError("empty resume")
+        return {"rewritten_blocks": [{"section": "professional_summary", "subsection": "summary", "content": job_description}]}
+
+    monkeypatch.setattr(server, "rewrite_queue", TaskQueue(fake_rewriter, workers=2, max_pending=5))
+    with TestClient(server.app) as client:
+        ok = client.post("/tools/full_resume_rewriter/submit", json={"job_description": "Analyst", "resume_rows": [{}]})
+        bad = client.post("/tools/full_resume_rewriter/submit", json={"job_description": "Analyst", "resume_rows": []})
+        assert ok.status_code == 202
+        done = wait_for(client, ok.json()["task_id"])
+        assert done["result"]["rewritten_blocks"][0]["content"] == "Analyst"
+        failed = wait_for(client, bad.json()["task_id"])
+        assert failed["error"] == "empty resume"
+        assert client.get("/tasks/missing").status_code == 404
+
+def test_queue_depth_limit_returns_429(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(server, "rewrite_queue", TaskQueue(lambda **_: release.wait(5), workers=1, max_pending=1))
+    with TestClient(server.app) as client:
+        codes = [client.post("/tools/full_resume_rewriter/submit", json={}).status_code for _ in range(4)]
+        release.set()
+    # One task running plus one queued is the most the queue can hold
+    assert codes[0] == 202
+    assert codes.count(202) <= 2
+    assert 429 in codes
+
+def test_positions_follow_the_queue_and_finished_tasks_are_pruned():
+    async def run():
+        release = threading.Event()
+        queue = TaskQueue(lambda **_: release.wait(5), workers=1, max_pending=5, keep_finished=0)
+        await queue.start()
+        ids = [queue.submit({})["task_id"] for _ in range(3)]
+        await asyncio.sleep(0.05)
+        positions = [queue.get(task_id).get("position") for task_id in ids]
+        release.set()
+        while queue.tasks:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return ids, positions, queue
+
+    ids, positions, queue = asyncio.run(run())
+    assert positions == [None, 1, 2]
+    assert queue.get(ids[0]) is None and not queue.tasks
@@ -0,0 +1,40 @@
+# tests/test_ttl_cache.py
+
+from utils.ttl_cache import TTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_drops_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_entries=10, ttl=60, clock=clock)
+    cache.set("q", {"results": []})
+    clock.now += 59
+    assert cache.get("q") == {"results": []}
+    clock.now += 2
+    assert cache.get("q") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_sqlite_backing_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    TTLCache(max_entries=10, path=path).set("q", {"results": [{"title": "Analyst"}]})
+    reopened = TTLCache(max_entries=10, path=path)
+    assert reopened.get("q") == {"results": [{"title": "Analyst"}]}
+    assert reopened.stats()["hits"] == 1
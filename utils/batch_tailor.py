@@ -0,0 +1,124 @@
+# utils/batch_tailor.py
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from utils.job_dedup import job_key
+from utils.llm_backends import OLLAMA_URLS
+from utils.resume_model import Resume
+from utils.resume_rewriter import enforce_all_guidelines, full_resume_rewriter
+from resume.generate_pdf import render_resume_pdf
+from resume.page_fit import fit_to_page
+
+load_dotenv()
+# Match OLLAMA_NUM_PARALLEL on every server: more workers than the servers run in parallel only queue up inside Ollama
+BATCH_TAILOR_WORKERS = int(os.getenv(
+    "BATCH_TAILOR_WORKERS", int(os.getenv("OLLAMA_NUM_PARALLEL", "1")) * len(OLLAMA_URLS)
+))
+BATCH_EXPORT_DIR = os.path.join("exports", "batch")
+
+def slugify(text, limit=40):
+    return re.sub(r"[^a-z0-9]+", "_", str(text or "").lower()).strip("_")[:limit] or "job"
+
+def job_output_name(job):
+    # Stable across runs so a re-run finds the files a previous run already wrote
+    digest = hashlib.sha1(job_key(job).encode("utf-8")).hexdigest()[:8]
+    return f"{slugify(job.get('company'), 24)}_{slugify(job.get('title'))}_{digest}"
+
+def job_description_text(job):
+    parts = [job.get("title"), job.get("company"), job.get("location"), job.get("description")]
+    return "\n".join(str(p) for p in parts if p)
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, "manifest.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+def batch_inputs_hash(resume_rows, make_pdf, fit_page):
+    # A manifest entry is only reused for the same master resume and output options
+    data = json.dumps([resume_rows, bool(make_pdf), bool(fit_page)], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+def tailor_one(job, resume_rows, out_dir, force_regenerate=False, make_pdf=True, fit_page=False):
+    name = job_output_name(job)
+    result = full_resume_rewriter(job_description_text(job), resume_rows, force_regenerate=force_regenerate)
+    errors = [b for b in result.get("rewritten_blocks") or [] if b.get("section") == "error"]
+    if errors:
+        raise RuntimeError(errors[0].get("content") or "LLM output could not be parsed")
+    blocks = enforce_all_guidelines(result.get("rewritten_blocks") or [], resume_rows)
+    if fit_page:
+        blocks, _ = fit_to_page(blocks, job_description_text(job))
+
+    resume = Resume.from_records(blocks)
+    csv_path = os.path.join(out_dir, f"{name}.csv")
+    resume.to_csv(csv_path)
+
+    pdf_path = None
+    if make_pdf:
+        pdf_path = render_resume_pdf(resume, os.path.join(out_dir, f"{name}.pdf"))
+    # Sections whose rewrite failed kept the master wording; the job is written but marked partial
+    failed_sections = sorted(result.get("failed_sections") or [])
+    return {"csv": csv_path, "pdf": pdf_path, "cached": bool(result.get("cached")), "failed_sections": failed_sections}
+
+def tailor_jobs(jobs, resume_rows, out_dir=BATCH_EXPORT_DIR, max_workers=BATCH_TAILOR_WORKERS,
+                on_progress=None, force_regenerate=False, make_pdf=True, fit_page=False):
+    # Tailors resume_rows to every job with at most max_workers LLM calls in flight.
+    # Progress is recorded in <out_dir>/manifest.json after every job, so re-running the same
+    # shortlist with the same resume and options skips what already finished and only retries failed
+    # and partial jobs (written, but with some sections left in their master wording).
+    # Jobs that share an output name are tailored once.
+    # fit_page trims each resume to one page (resume.page_fit) before it is written.
+    # on_progress(finished, total, entry) runs in the caller's thread.
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    inputs = batch_inputs_hash(resume_rows, make_pdf, fit_page)
+
+    pending, names = [], set()
+    for job in jobs:
+        name = job_output_name(job)
+        if name in names:
+            continue
+        names.add(name)
+        entry = manifest.get(name)
+        if (not force_regenerate and entry and entry.get("status") == "done" and entry.get("inputs") == inputs
+                and os.path.exists(entry.get("csv") or "")):
+            continue
+        pending.append((name, job))
+
+    total = len(names)
+    finished = total - len(pending)
+    if on_progress and finished:
+        on_progress(finished, total, None)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(tailor_one, job, resume_rows, out_dir, force_regenerate, make_pdf, fit_page): (name, job)
+            for name, job in pending
+        }
+        for future in as_completed(futures):
+            name, job = futures[future]
+            entry = {"name": name, "title": job.get("title"), "company": job.get("company"), "url": job.get("url"), "inputs": inputs}
+            try:
+                result = future.result()
+                entry.update(result, status="partial" if result["failed_sections"] else "done")
+            except Exception as e:
+                entry.update(status="failed", error=str(e))
+            manifest[name] = entry
+            save_manifest(out_dir, manifest)
+            finished += 1
+            if on_progress:
+                on_progress(finished, total, entry)
+
+    return [manifest[job_output_name(job)] for job in jobs]
@@ -2,13 +2,36 @@
 
 import requests
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8000")
+MCP_MAX_WORKERS = int(os.getenv("MCP_MAX_WORKERS", "8"))
+
+# One pooled session so concurrent calls reuse keep-alive connections to the MCP server
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=MCP_MAX_WORKERS))
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=MCP_MAX_WORKERS))
 
 def call_mcp_tool(tool_name, payload={}):
     url = f"{MCP_SERVER_URL}/tools/{tool_name}/invoke"
-    response = requests.post(url, json=payload)
+    response = _session.post(url, json=payload)
+    response.raise_for_status()
+    return response.json()
+
+def stream_mcp_tool(tool_name, payload={}):
+    # Yields each NDJSON item from a streaming tool endpoint as soon as it arrives
+    url = f"{MCP_SERVER_URL}/tools/{tool_name}/stream"
+    with _session.post(url, json=payload, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def call_mcp_tool_batch(tool_name, payloads):
+    # One request for many queries; the server runs them concurrently and de-duplicates jobs
+    url = f"{MCP_SERVER_URL}/tools/{tool_name}/batch_invoke"
+    response = _session.post(url, json={"queries": payloads})
     response.raise_for_status()
     return response.json()
@@ -0,0 +1,99 @@
+# utils/job_dedup.py
+
+import re
+import zlib
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 3
+# Adzuna only returns the opening of a description, so comparing the first words keeps
+# cross-source copies of the same posting similar
+DESCRIPTION_WORDS = 60
+
+def job_key(job):
+    url = (job.get("url") or "").strip()
+    if url and url != "#":
+        return url
+    return "|".join((job.get(k) or "").strip().lower() for k in ("title", "company", "location"))
+
+def normalize_words(text):
+    text = re.sub(r"<[^>]+>", " ", str(text or "").lower())
+    return re.findall(r"[a-z0-9]+", text)
+
+def job_shingles(job):
+    words = (
+        normalize_words(job.get("title"))
+        + normalize_words(job.get("company"))
+        + normalize_words(job.get("description"))[:DESCRIPTION_WORDS]
+    )
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+class JobDeduplicator:
+    # Incremental: add() jobs as they arrive and read .jobs for the unique ones.
+    # Exact copies match on URL (or title|company|location); near copies match when the
+    # MinHash estimate of shingle Jaccard similarity reaches the threshold. LSH banding keeps
+    # each add() close to constant time however many jobs are already merged.
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, seed=7):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._by_key = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self.jobs = []
+        self.duplicates = 0
+
+    def signature(self, shingles):
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((self._a * hashes + self._b) % MERSENNE_PRIME).min(axis=1)
+
+    def _merge(self, kept, job):
+        self.duplicates += 1
+        kept["duplicates"] = kept.get("duplicates", 0) + 1
+        label = job.get("search_label")
+        if label and label not in kept["search_labels"]:
+            kept["search_labels"].append(label)
+        return False
+
+    def add(self, job):
+        # Returns True when the job is new, False when it was merged into an earlier copy
+        key = job_key(job)
+        if key in self._by_key:
+            return self._merge(self.jobs[self._by_key[key]], job)
+
+        shingles = job_shingles(job)
+        signature = self.signature(shingles) if shingles else None
+        if signature is not None:
+            bands = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+            candidates = set()
+            for bucket, band in zip(self._buckets, bands):
+                candidates.update(bucket.get(band, ()))
+            for idx in sorted(candidates):
+                if np.mean(self._signatures[idx] == signature) >= self.threshold:
+                    self._by_key[key] = idx
+                    return self._merge(self.jobs[idx], job)
+
+        idx = len(self.jobs)
+        job.setdefault("search_labels", [job["search_label"]] if job.get("search_label") else [])
+        self.jobs.append(job)
+        self._signatures.append(signature)
+        self._by_key[key] = idx
+        if signature is not None:
+            for bucket, band in zip(self._buckets, bands):
+                bucket.setdefault(band, []).append(idx)
+        return True
+
+    def extend(self, jobs):
+        return sum(self.add(job) for job in jobs)
+
+def dedupe_jobs(jobs, threshold=0.7):
+    dedup = JobDeduplicator(threshold=threshold)
+    dedup.extend(jobs)
+    return dedup.jobs
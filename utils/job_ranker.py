@@ -0,0 +1,83 @@
+# utils/job_ranker.py
+
+import threading
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+from utils.profile_store import USER_DIR, get_profile_store
+
+RANKED_SECTIONS = ("professional_summary", "technical_skills", "professional_experience", "projects", "certifications")
+
+def resume_documents(resume_rows):
+    # One document per resume block; contact details carry no signal for matching
+    docs = [
+        str(row.get("content") or "").replace("**", " ").replace("•", " ")
+        for row in resume_rows
+        if row.get("section") in RANKED_SECTIONS or (row.get("section"), row.get("subsection")) == ("personal_info", "target_roles")
+    ]
+    return [d for d in docs if d.strip()]
+
+def job_text(job):
+    # Titles say the most about a posting, so they count twice
+    title = str(job.get("title") or "")
+    return f"{title} {title} {job.get('description') or ''}"
+
+class ResumeMatcher:
+    # The vocabulary and IDF weights come from the resume's own blocks, so the resume vector is
+    # computed once and scoring any number of jobs is one sparse matrix product
+    def __init__(self, resume_rows):
+        docs = resume_documents(resume_rows)
+        if not docs:
+            raise ValueError("Resume has no content to match against")
+        self.vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True, ngram_range=(1, 2))
+        self.vectorizer.fit(docs)
+        self.resume_vector = normalize(self.vectorizer.transform([" ".join(docs)])).T.tocsc()
+
+    def score_texts(self, texts):
+        if not texts:
+            return []
+        matrix = self.vectorizer.transform(texts)
+        return (matrix @ self.resume_vector).toarray().ravel().tolist()
+
+    def score_jobs(self, jobs):
+        return self.score_texts([job_text(job) for job in jobs])
+
+def similarity_scores(query, texts):
+    # Cosine similarity of each text to query, with IDF taken from the texts themselves
+    if not texts:
+        return []
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+    try:
+        matrix = vectorizer.fit_transform(list(texts) + [query])
+    except ValueError:
+        return [0.0] * len(texts)
+    return (matrix[:-1] @ matrix[-1].T).toarray().ravel().tolist()
+
+def rank_jobs(jobs, matcher=None):
+    # Returns a new list, best match first; each job gets a "relevance" score in [0, 1].
+    # Without a matcher (no master resume, or "Newest" chosen) the newest postings come first.
+    if matcher is None:
+        return sorted(jobs, key=lambda job: job.get("created") or "", reverse=True)
+    for job, score in zip(jobs, matcher.score_jobs(jobs)):
+        job["relevance"] = round(score, 4)
+    return sorted(jobs, key=lambda job: (job.get("relevance", 0), job.get("created") or ""), reverse=True)
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+def get_resume_matcher(profile_name, user_dir=USER_DIR):
+    # Cached per profile and rebuilt only when the profile store reloads the master resume; None without a resume
+    resume = get_profile_store(user_dir).get_master_resume(profile_name)
+    if resume is None:
+        return None
+    key = (user_dir, profile_name)
+    with _matchers_lock:
+        cached = _matchers.get(key)
+        if cached and cached[0] is resume:
+            return cached[1]
+    try:
+        matcher = ResumeMatcher(resume.to_records())
+    except ValueError:
+        matcher = None
+    with _matchers_lock:
+        _matchers[key] = (resume, matcher)
+    return matcher
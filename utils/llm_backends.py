@@ -0,0 +1,406 @@
+# utils/llm_backends.py
+
+import json
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+# "ollama" (default), "openai" for any server speaking /v1/chat/completions (llama.cpp, vLLM, LM Studio...), or "fake"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").lower()
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+# Comma-separated; with more than one URL requests are spread over all of them
+OLLAMA_URLS = [u.strip() for u in (os.getenv("OLLAMA_URLS") or OLLAMA_URL).split(",") if u.strip()]
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:8080/v1")
+OPENAI_BASE_URLS = [u.strip() for u in (os.getenv("OPENAI_BASE_URLS") or OPENAI_BASE_URL).split(",") if u.strip()]
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", OLLAMA_MODEL)
+# Requests past this many wait client-side instead of piling up in the server's queue
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+# Generous: a long rewrite on a CPU-only box can take minutes before the first byte
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "600"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "1.0"))
+# A failed endpoint gets no traffic for this many seconds unless every endpoint is down
+LLM_ENDPOINT_COOLDOWN = float(os.getenv("LLM_ENDPOINT_COOLDOWN", "30"))
+# Seconds between active health checks of pooled endpoints; 0 relies on failures alone
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "0"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class LLMError(RuntimeError):
+    pass
+
+class LLMBackend:
+    # Subclasses implement _generate(prompt) and _stream(prompt). The public generate()/stream() add a
+    # per-backend concurrency limit and retry with exponential backoff on connection errors and
+    # 429/5xx answers. A stream is only retried if it failed before yielding its first token.
+    name = "base"
+    health_url = None
+
+    def __init__(self, model, max_concurrency=LLM_MAX_CONCURRENCY, timeout=(LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT),
+                 max_retries=LLM_MAX_RETRIES, backoff=LLM_RETRY_BACKOFF):
+        self.model = model
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = backoff
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def cache_id(self):
+        # Goes into rewrite cache keys: a different model must not reuse another model's rewrites
+        return f"{self.name}:{self.model}"
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def generate(self, prompt):
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return self._generate(prompt)
+                except Exception as e:
+                    if attempt == self.max_retries or not self._retryable(e):
+                        raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def stream(self, prompt):
+        with self._slots:
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    for token in self._stream(prompt):
+                        started = True
+                        yield token
+                    return
+                except Exception as e:
+                    if started or attempt == self.max_retries or not self._retryable(e):
+                        raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _retryable(self, error):
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return error.response.status_code in RETRY_STATUS
+        return False
+
+    def check_health(self):
+        if not self.health_url:
+            return True
+        try:
+            res = self.session.get(self.health_url, timeout=(self.timeout[0], self.timeout[0]))
+            return res.ok
+        except requests.RequestException:
+            return False
+
+    def _post(self, url, payload, stream=False, headers=None):
+        res = self.session.post(url, json=payload, stream=stream, timeout=self.timeout, headers=headers)
+        try:
+            res.raise_for_status()
+        except requests.HTTPError:
+            res.close()
+            raise
+        return res
+
+    def _generate(self, prompt):
+        raise NotImplementedError
+
+    def _stream(self, prompt):
+        raise NotImplementedError
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def __init__(self, url=OLLAMA_URL, model=OLLAMA_MODEL, **kwargs):
+        super().__init__(model, **kwargs)
+        self.url = url
+        self.health_url = url.split("/api/")[0] + "/api/tags"
+
+    def _generate(self, prompt):
+        res = self._post(self.url, {"model": self.model, "prompt": prompt, "stream": False})
+        return res.json().get("response", "").strip()
+
+    def _stream(self, prompt):
+        # Ollama streams NDJSON, one {"response": token, "done": bool} object per line
+        with self._post(self.url, {"model": self.model, "prompt": prompt, "stream": True}, stream=True) as res:
+            for line in res.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise LLMError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+class OpenAICompatibleBackend(LLMBackend):
+    # Plain HTTP against /chat/completions rather than the openai SDK, so it shares the pooled
+    # session, timeouts and retry handling with the other backends
+    name = "openai"
+
+    def __init__(self, base_url=OPENAI_BASE_URL, model=OPENAI_MODEL, api_key=OPENAI_API_KEY, **kwargs):
+        super().__init__(model, **kwargs)
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.health_url = base_url.rstrip("/") + "/models"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else None
+
+    def _payload(self, prompt, stream):
+        return {"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+
+    def _generate(self, prompt):
+        res = self._post(self.url, self._payload(prompt, False), headers=self.headers)
+        choices = res.json().get("choices") or [{}]
+        return ((choices[0].get("message") or {}).get("content") or "").strip()
+
+    def _stream(self, prompt):
+        # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+        with self._post(self.url, self._payload(prompt, True), stream=True, headers=self.headers) as res:
+            for line in res.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise LLMError(chunk["error"].get("message") if isinstance(chunk["error"], dict) else chunk["error"])
+                for choice in chunk.get("choices") or []:
+                    token = (choice.get("delta") or {}).get("content")
+                    if token:
+                        yield token
+
+class FakeBackend(LLMBackend):
+    # Deterministic stand-in for tests and offline development. responses is a string, a list
+    # consumed in order (the last one repeats), or a callable taking the prompt. Prompts are recorded.
+    name = "fake"
+
+    def __init__(self, responses="", model="fake", chunk_size=8, **kwargs):
+        kwargs.setdefault("max_retries", 0)
+        super().__init__(model, **kwargs)
+        self.responses = responses
+        self.chunk_size = max(1, chunk_size)
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def _generate(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+            count = len(self.prompts)
+        if callable(self.responses):
+            return self.responses(prompt)
+        if isinstance(self.responses, list):
+            return self.responses[min(count, len(self.responses)) - 1] if self.responses else ""
+        return self.responses
+
+    def _stream(self, prompt):
+        text = self._generate(prompt)
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+class BackendPool(LLMBackend):
+    # Spreads requests over several servers running the same model. Each request goes to the healthy
+    # endpoint with the fewest requests in flight (ties go to the lower average latency). An endpoint
+    # that fails with a retryable error is cooled down and the request fails over to the next one;
+    # streams only fail over before their first token. Members should have max_retries=0 so failover
+    # is immediate rather than waiting out backoff on a dead host.
+    name = "pool"
+
+    def __init__(self, backends, cooldown=LLM_ENDPOINT_COOLDOWN, clock=time.monotonic):
+        if not backends:
+            raise ValueError("BackendPool needs at least one backend")
+        super().__init__(backends[0].model, max_concurrency=sum(b.max_concurrency for b in backends), max_retries=0)
+        self.backends = list(backends)
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._health_thread = None
+        self._stop_health = threading.Event()
+        self._state = [
+            {"outstanding": 0, "requests": 0, "failures": 0, "latency": None, "down_until": 0.0, "last_error": None}
+            for _ in self.backends
+        ]
+
+    @property
+    def cache_id(self):
+        return self.backends[0].cache_id
+
+    def _acquire(self, tried):
+        with self._lock:
+            now = self.clock()
+            candidates = [i for i in range(len(self.backends)) if i not in tried]
+            if not candidates:
+                return None
+            healthy = [i for i in candidates if self._state[i]["down_until"] <= now]
+            # With every endpoint down, try the one that has been down longest instead of failing outright
+            pool = healthy or sorted(candidates, key=lambda i: self._state[i]["down_until"])[:1]
+            index = min(pool, key=lambda i: (self._state[i]["outstanding"], self._state[i]["latency"] or 0.0))
+            self._state[index]["outstanding"] += 1
+            self._state[index]["requests"] += 1
+            return index
+
+    def _release(self, index, started, error=None):
+        with self._lock:
+            state = self._state[index]
+            state["outstanding"] -= 1
+            if error is None:
+                elapsed = self.clock() - started
+                # Exponential moving average so one slow generation does not dominate
+                state["latency"] = elapsed if state["latency"] is None else 0.8 * state["latency"] + 0.2 * elapsed
+                state["down_until"] = 0.0
+            else:
+                state["failures"] += 1
+                state["last_error"] = str(error) or type(error).__name__
+                if self.backends[index]._retryable(error):
+                    state["down_until"] = self.clock() + self.cooldown
+
+    def generate(self, prompt):
+        tried, last_error = set(), None
+        while True:
+            index = self._acquire(tried)
+            if index is None:
+                raise last_error or LLMError("No LLM endpoint available")
+            started = self.clock()
+            try:
+                result = self.backends[index].generate(prompt)
+            except Exception as e:
+                self._release(index, started, error=e)
+                if not self.backends[index]._retryable(e):
+                    raise
+                tried.add(index)
+                last_error = e
+                continue
+            self._release(index, started)
+            return result
+
+    def stream(self, prompt):
+        tried, last_error = set(), None
+        while True:
+            index = self._acquire(tried)
+            if index is None:
+                raise last_error or LLMError("No LLM endpoint available")
+            started, yielded = self.clock(), False
+            try:
+                for token in self.backends[index].stream(prompt):
+                    yielded = True
+                    yield token
+            except GeneratorExit:
+                self._release(index, started)
+                raise
+            except Exception as e:
+                self._release(index, started, error=e)
+                if yielded or not self.backends[index]._retryable(e):
+                    raise
+                tried.add(index)
+                last_error = e
+                continue
+            self._release(index, started)
+            return
+
+    def check_health(self):
+        # Probes every endpoint now; healthy ones rejoin the rotation, unreachable ones are cooled down
+        results = [backend.check_health() for backend in self.backends]
+        with self._lock:
+            now = self.clock()
+            for state, ok in zip(self._state, results):
+                if ok:
+                    state["down_until"] = 0.0
+                elif state["down_until"] <= now:
+                    state["down_until"] = now + self.cooldown
+                    state["last_error"] = "health check failed"
+        return any(results)
+
+    def start_health_checks(self, interval=LLM_HEALTH_INTERVAL):
+        if interval <= 0 or self._health_thread is not None:
+            return
+        self._stop_health.clear()
+
+        def loop():
+            while not self._stop_health.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name="llm-health", daemon=True)
+        self._health_thread.start()
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            return [
+                {
+                    "endpoint": getattr(backend, "url", backend.name),
+                    "healthy": state["down_until"] <= now,
+                    "outstanding": state["outstanding"],
+                    "requests": state["requests"],
+                    "failures": state["failures"],
+                    "avg_latency": round(state["latency"], 3) if state["latency"] is not None else None,
+                    "last_error": state["last_error"],
+                }
+                for backend, state in zip(self.backends, self._state)
+            ]
+
+    def close(self):
+        self._stop_health.set()
+        self._health_thread = None
+        for backend in self.backends:
+            backend.close()
+
+BACKENDS = {"ollama": OllamaBackend, "openai": OpenAICompatibleBackend, "fake": FakeBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def create_backend(name=LLM_BACKEND, **kwargs):
+    # OLLAMA_URLS / OPENAI_BASE_URLS with more than one entry give a BackendPool over all of them
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{name}'; expected one of {', '.join(BACKENDS)}")
+    urls = {"ollama": ("url", OLLAMA_URLS), "openai": ("base_url", OPENAI_BASE_URLS)}.get(name)
+    if urls is None or len(urls[1]) < 2 or urls[0] in kwargs:
+        return BACKENDS[name](**kwargs)
+    kwargs["max_retries"] = 0
+    pool = BackendPool([BACKENDS[name](**{urls[0]: url}, **kwargs) for url in urls[1]])
+    pool.start_health_checks()
+    return pool
+
+def llm_stats():
+    # Per-endpoint load and latency, or a single entry for an unpooled backend
+    backend = get_backend()
+    if isinstance(backend, BackendPool):
+        return backend.stats()
+    return [{"endpoint": getattr(backend, "url", backend.name), "backend": backend.cache_id}]
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+def set_backend(backend):
+    # Swap the process-wide backend (tests, or pointing a batch run at another server); returns the old one
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
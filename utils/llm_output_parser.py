@@ -0,0 +1,175 @@
+# utils/llm_output_parser.py
+
+import json
+import re
+
+KNOWN_SECTIONS = (
+    "personal_info", "professional_summary", "technical_skills", "professional_experience", "experience",
+    "education", "certifications", "certification", "projects", "project"
+)
+CSV_ROW_START = re.compile(r'^\s*"?(' + "|".join(KNOWN_SECTIONS) + r')"?\s*,\s*("[^"]*"|[^,]*)\s*,(.*)$', re.IGNORECASE)
+CSV_HEADER = re.compile(r'^\s*"?section"?\s*,\s*"?subsection"?\s*,\s*"?content"?\s*$', re.IGNORECASE)
+
+class ResumeOutputParser:
+    # Incremental parser for LLM resume output. feed() takes text as it streams in and returns the
+    # blocks completed so far; close() flushes the last one. Accepts a JSON array of block objects
+    # (nested shapes are left for normalize_ollama_blocks) or section,subsection,content CSV with
+    # unquoted commas and multi-line content. Chatter, code fences and malformed or truncated
+    # blocks are skipped, so every complete block survives even when the whole output would not parse.
+    def __init__(self):
+        self.text = ""
+        self.blocks = []
+        self.format = None
+        self._pos = 0
+        # JSON scanner state
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start = None
+        # CSV state
+        self._row = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        if self.format is None:
+            self._detect_format()
+        if self.format == "json":
+            new = self._scan_json()
+        elif self.format == "csv":
+            new = self._scan_csv(final=False)
+        else:
+            new = []
+        self.blocks.extend(new)
+        return new
+
+    def close(self):
+        new = []
+        if self.format is None:
+            self._detect_format(final=True)
+            if self.format == "json":
+                new = self._scan_json()
+        if self.format == "csv":
+            new = self._scan_csv(final=True)
+        self.blocks.extend(new)
+        return new
+
+    def _detect_format(self, final=False):
+        # Decide from the first line that looks like either format; preamble lines are skipped
+        end = len(self.text) if final else self.text.rfind("\n") + 1
+        for line in self.text[self._pos:end].splitlines(True):
+            stripped = line.strip()
+            if stripped.startswith("[") or stripped.startswith("{"):
+                self.format = "json"
+                self._pos = self.text.find(stripped[0], self._pos)
+                return
+            if CSV_HEADER.match(stripped) or CSV_ROW_START.match(stripped):
+                self.format = "csv"
+                return
+            # JSON on the same line as its preamble ("Sure! Here it is: [{...")
+            start = self._inline_json_start(self._pos, final)
+            if start is None:
+                return
+            if start >= 0:
+                self.format = "json"
+                self._pos = start
+                return
+            self._pos += len(line)
+        if not final:
+            # A JSON opener can arrive before the first newline
+            for i in range(self._pos, len(self.text)):
+                if self.text[i] in "[{":
+                    self.format = "json"
+                    self._pos = i
+                    return
+                if not self.text[i].isspace():
+                    break
+
+    def _inline_json_start(self, line_start, final):
+        # Position of a JSON array or object opened inside the line at line_start, -1 if there is
+        # none, or None when the opener ends the text so far and what follows has not arrived yet
+        text = self.text
+        line_end = text.find("\n", line_start)
+        line_end = len(text) if line_end < 0 else line_end
+        for i in range(line_start, line_end):
+            if text[i] not in "[{":
+                continue
+            rest = text[i + 1:].lstrip()
+            if not rest:
+                return -1 if final else None
+            if rest[0] == "{" or (text[i] == "{" and rest[0] == '"'):
+                return i
+        return -1
+
+    def _scan_json(self):
+        new = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._obj_start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        block = json.loads(text[self._obj_start:i + 1])
+                    except ValueError:
+                        block = None
+                    if isinstance(block, dict) and block.get("section"):
+                        new.append(block)
+                    self._obj_start = None
+        self._pos = len(text)
+        return new
+
+    def _scan_csv(self, final):
+        new = []
+        end = len(self.text) if final else self.text.rfind("\n") + 1
+        if end <= self._pos:
+            return self._flush_row(new) if final else new
+        lines = self.text[self._pos:end].splitlines()
+        self._pos = end
+        for line in lines:
+            stripped = line.strip()
+            match = CSV_ROW_START.match(line)
+            if match and not CSV_HEADER.match(stripped):
+                self._flush_row(new)
+                section, subsection, content = match.groups()
+                self._row = [section.lower(), subsection.strip().strip('"'), content.strip()]
+            elif not stripped:
+                self._flush_row(new)
+            elif stripped.startswith("```") or CSV_HEADER.match(stripped):
+                continue
+            elif self._row is not None:
+                self._row[2] += "\n" + stripped
+        if final:
+            self._flush_row(new)
+        return new
+
+    def _flush_row(self, new):
+        if self._row is not None:
+            section, subsection, content = self._row
+            content = content.strip()
+            if content.startswith('"'):
+                content = content[1:]
+                if content.endswith('"'):
+                    content = content[:-1]
+                content = content.replace('""', '"')
+            new.append({"section": section, "subsection": subsection, "content": content.strip()})
+            self._row = None
+        return new
+
+def parse_llm_output(text):
+    parser = ResumeOutputParser()
+    parser.feed(text)
+    parser.close()
+    return parser.blocks
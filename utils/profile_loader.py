@@ -1,10 +1,12 @@
 # utils\profile_loader.py
 
-import json
 import os
+from utils.profile_store import USER_DIR, get_profile_store
 
-def load_user_profile(path="users/user_profile.json"):
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    return {}
\ No newline at end of file
+def load_user_profile(name_or_path="users/user_profile.json"):
+    # Accepts a bare profile name ("alex_smith") or a path to its JSON file; {} when there is none.
+    # Served from the in-process profile store, so reruns do not re-read the file.
+    if name_or_path.endswith(".json") or os.sep in name_or_path or "/" in name_or_path:
+        user_dir, filename = os.path.split(name_or_path)
+        return get_profile_store(user_dir or ".").get_profile(os.path.splitext(filename)[0])
+    return get_profile_store(USER_DIR).get_profile(name_or_path)
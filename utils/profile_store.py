@@ -0,0 +1,131 @@
+# utils/profile_store.py
+
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from utils.resume_model import Resume
+
+load_dotenv()
+USER_DIR = os.getenv("USER_DIR", "users")
+# Seconds a cached file is trusted before its mtime is checked again. Writes made through the
+# store are seen at once; this only bounds how long an edit made outside the app goes unnoticed.
+PROFILE_CHECK_INTERVAL = float(os.getenv("PROFILE_CHECK_INTERVAL", "2"))
+ACTIVE_PROFILE_FILE = "active_profile.json"
+
+class ProfileStore:
+    # Profiles (<name>.json), master resumes (<name>_master_resume.csv) and the profile list, parsed
+    # once and cached in process. A cached entry is revalidated by mtime at most every
+    # check_interval seconds, so a Streamlit rerun touches the filesystem only when that check is
+    # due, and only with a stat. Returned profiles are copies; returned Resumes are shared, treat them as read-only.
+    def __init__(self, user_dir=USER_DIR, check_interval=PROFILE_CHECK_INTERVAL, clock=time.monotonic):
+        self.user_dir = user_dir
+        self.check_interval = check_interval
+        self.clock = clock
+        self.loads = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def profile_path(self, name):
+        return os.path.join(self.user_dir, f"{name}.json")
+
+    def master_resume_path(self, name):
+        return os.path.join(self.user_dir, f"{name}_master_resume.csv")
+
+    def _cached(self, key, path, load):
+        # key -> (mtime or None when missing, last checked, value)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.check_interval:
+                return entry[2]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if entry and entry[0] == mtime:
+            value = entry[2]
+        else:
+            value = None
+            if mtime is not None:
+                value = load()
+                self.loads += 1
+        with self._lock:
+            self._entries[key] = (mtime, now, value)
+        return value
+
+    def get_profile(self, name):
+        path = self.profile_path(name)
+
+        def load():
+            with open(path, "r") as f:
+                return json.load(f)
+
+        profile = self._cached(("profile", name), path, load)
+        return dict(profile) if profile else {}
+
+    def get_master_resume(self, name):
+        path = self.master_resume_path(name)
+        return self._cached(("resume", name), path, lambda: Resume.from_csv(path))
+
+    def get_master_resume_bytes(self, name):
+        # The file exactly as uploaded, for downloads; reads go through get_master_resume
+        path = self.master_resume_path(name)
+
+        def load():
+            with open(path, "rb") as f:
+                return f.read()
+
+        return self._cached(("resume_bytes", name), path, load)
+
+    def has_master_resume(self, name):
+        return self.get_master_resume(name) is not None
+
+    def list_profiles(self):
+        # Adding or removing a file changes the directory's mtime, so this is revalidated the same way
+        def load():
+            return sorted(
+                os.path.splitext(entry.name)[0]
+                for entry in os.scandir(self.user_dir)
+                if entry.name.endswith(".json") and entry.is_file() and entry.name != ACTIVE_PROFILE_FILE
+            )
+
+        return list(self._cached(("profiles",), self.user_dir, load) or [])
+
+    def save_profile(self, name, data):
+        os.makedirs(self.user_dir, exist_ok=True)
+        with open(self.profile_path(name), "w") as f:
+            json.dump(data, f, indent=2)
+        self.invalidate(name)
+
+    def save_master_resume(self, name, data):
+        # data is the raw CSV bytes, e.g. from a Streamlit upload
+        os.makedirs(self.user_dir, exist_ok=True)
+        with open(self.master_resume_path(name), "wb") as f:
+            f.write(data)
+        self.invalidate(name)
+
+    def set_active_profile(self, name):
+        os.makedirs(self.user_dir, exist_ok=True)
+        with open(os.path.join(self.user_dir, ACTIVE_PROFILE_FILE), "w") as f:
+            json.dump({"active_profile": name}, f)
+
+    def invalidate(self, name=None):
+        # Drops the cached files of one profile (and the profile list), or everything
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in (("profile", name), ("resume", name), ("resume_bytes", name), ("profiles",)):
+                    self._entries.pop(key, None)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_profile_store(user_dir=USER_DIR):
+    with _stores_lock:
+        store = _stores.get(user_dir)
+        if store is None:
+            store = _stores[user_dir] = ProfileStore(user_dir)
+        return store
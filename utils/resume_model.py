@@ -0,0 +1,124 @@
+# utils/resume_model.py
+
+import csv
+import io
+import os
+
+FIELDS = ("section", "subsection", "content")
+
+def clean(value):
+    # None and NaN (pandas' empty cell) become ""; everything else is kept as text
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value)
+
+class ResumeBlock:
+    __slots__ = FIELDS
+
+    def __init__(self, section, subsection="", content=""):
+        self.section = section
+        self.subsection = subsection
+        self.content = content
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(clean(record.get("section")), clean(record.get("subsection")), clean(record.get("content")))
+
+    def to_record(self):
+        return {"section": self.section, "subsection": self.subsection, "content": self.content}
+
+    def lines(self):
+        return [line for line in self.content.split("\n") if line.strip()]
+
+    def __eq__(self, other):
+        if not isinstance(other, ResumeBlock):
+            return NotImplemented
+        return (self.section, self.subsection, self.content) == (other.section, other.subsection, other.content)
+
+    def __repr__(self):
+        return f"ResumeBlock({self.section!r}, {self.subsection!r}, {self.content!r})"
+
+class Resume:
+    # Resume blocks in file order, indexed once on construction: section -> blocks in order and
+    # (section, subsection) -> first matching block. Pages, the rewriter and the PDF generator
+    # look fields up here instead of re-reading the CSV or re-filtering a DataFrame.
+    def __init__(self, blocks=()):
+        self.blocks = []
+        self._by_section = {}
+        self._by_key = {}
+        for block in blocks:
+            self.append(block)
+
+    def append(self, block):
+        self.blocks.append(block)
+        self._by_section.setdefault(block.section, []).append(block)
+        self._by_key.setdefault((block.section, block.subsection), block)
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(ResumeBlock.from_record(r) for r in records)
+
+    @classmethod
+    def from_csv(cls, source):
+        # source is a path or a text/binary file object (e.g. a Streamlit upload)
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, newline="", encoding="utf-8-sig") as f:
+                return cls.from_records(csv.DictReader(f))
+        text = source.read()
+        if isinstance(text, bytes):
+            text = text.decode("utf-8-sig")
+        return cls.from_records(csv.DictReader(io.StringIO(text, newline="")))
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls.from_records(df.to_dict(orient="records"))
+
+    def to_records(self):
+        return [block.to_record() for block in self.blocks]
+
+    def to_csv(self, path=None):
+        # Writes to path, or returns the CSV text when no path is given
+        buffer = io.StringIO(newline="")
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(self.to_records())
+        if path is None:
+            return buffer.getvalue()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+        return path
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.to_records(), columns=list(FIELDS))
+
+    def get(self, section, subsection, default=""):
+        block = self._by_key.get((section, subsection))
+        return block.content if block is not None else default
+
+    def section(self, name):
+        return list(self._by_section.get(name, ()))
+
+    def sections(self):
+        return list(self._by_section)
+
+    def grouped(self, section):
+        # [(subsection, non-blank lines)] per distinct subsection in order; rows sharing a subsection are merged
+        merged = {}
+        for block in self._by_section.get(section, ()):
+            merged.setdefault(block.subsection, []).append(block.content)
+        grouped = []
+        for sub, contents in merged.items():
+            lines = [line for line in "\n".join(contents).split("\n") if line.strip()]
+            if lines:
+                grouped.append((sub, lines))
+        return grouped
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __len__(self):
+        return len(self.blocks)
@@ -1,23 +1,70 @@
 # utils/resume_rewriter.py
 
 import os
-import requests
+import io
+import csv
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from utils.ttl_cache import TTLCache
+from utils.llm_backends import get_backend
+from utils.resume_model import Resume
+from utils.llm_output_parser import ResumeOutputParser, parse_llm_output
 
 load_dotenv()
 
-OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
-
-def run_ollama(prompt):
-    res = requests.post(OLLAMA_URL, json={
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False
-    })
-    res.raise_for_status()
-    return res.json().get("response", "").strip()
+REWRITE_CACHE_PATH = os.getenv("REWRITE_CACHE_PATH", ".cache/resume_rewrites.sqlite")
+REWRITE_CACHE_MAX_ENTRIES = int(os.getenv("REWRITE_CACHE_MAX_ENTRIES", "200"))
+# Upper bounds on what goes into the prompt, so prompt evaluation time stays flat as the master resume grows
+PROMPT_RESUME_TOKEN_BUDGET = int(os.getenv("PROMPT_RESUME_TOKEN_BUDGET", "1200"))
+PROMPT_JOB_TOKEN_BUDGET = int(os.getenv("PROMPT_JOB_TOKEN_BUDGET", "800"))
+# Rough characters per token for English text with Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+# Experience/project blocks below this similarity to the job are only sent to fill the minimum counts
+MIN_BLOCK_RELEVANCE = 0.05
+RANKED_MINIMUMS = {"professional_experience": 3, "projects": 4}
+# "single" sends one prompt for the whole resume; "sectioned" sends one prompt per section concurrently
+REWRITE_MODE = os.getenv("REWRITE_MODE", "single")
+SECTION_WORKERS = int(os.getenv("REWRITE_SECTION_WORKERS", os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+SECTION_RETRIES = int(os.getenv("REWRITE_SECTION_RETRIES", "1"))
+# Sections the rewrite must produce; any the LLM leaves out are regenerated on their own
+REQUIRED_SECTIONS = ("professional_summary", "technical_skills", "professional_experience", "projects")
+SECTION_PROMPT_SECTIONS = {"summary": "professional_summary", "skills": "technical_skills", "projects": "projects"}
+
+# Bump whenever build_rewrite_prompt changes so old cached rewrites are not reused
+PROMPT_VERSION = "3"
+
+_rewrite_cache = None
+
+def get_rewrite_cache():
+    global _rewrite_cache
+    if _rewrite_cache is None:
+        _rewrite_cache = TTLCache(max_entries=REWRITE_CACHE_MAX_ENTRIES, path=REWRITE_CACHE_PATH or None)
+    return _rewrite_cache
+
+def rewrite_cache_key(job_description, resume_blocks, mode="single"):
+    # Same backend and model, prompt, job description (ignoring whitespace) and resume -> same rewrite
+    payload = json.dumps(
+        [get_backend().cache_id, PROMPT_VERSION, mode, " ".join(safe_str(job_description).split()), resume_blocks],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def run_ollama(prompt, on_token=None):
+    # With on_token, tokens are streamed to the callback as they arrive and the full text is still returned
+    if on_token is not None:
+        parts = []
+        for token in stream_ollama(prompt):
+            parts.append(token)
+            on_token(token)
+        return "".join(parts).strip()
+    return get_backend().generate(prompt)
+
+def stream_ollama(prompt):
+    # Despite the name this streams from whichever backend LLM_BACKEND selects
+    yield from get_backend().stream(prompt)
 
 def pad_bullets(lines, limit):
     lines = [safe_str(l).strip() for l in lines if safe_str(l).strip()]
@@ -34,331 +81,291 @@ def pad_bullets(lines, limit):
     return lines[:limit]
 
 def format_resume_rows(rows):
+    # rows is a Resume or a list of section/subsection/content records
+    resume = rows if isinstance(rows, Resume) else Resume.from_records(rows)
     return [
-        {
-            "section": safe_str(row.get("section", "")).strip(),
-            "subsection": safe_str(row.get("subsection", "")).strip(),
-            "content": safe_str(row.get("content", "")).strip()
-        }
-        for row in rows if safe_str(row.get("section")) and safe_str(row.get("content"))
+        {"section": b.section.strip(), "subsection": b.subsection.strip(), "content": b.content.strip()}
+        for b in resume if b.section and b.content
     ]
 
 def safe_str(x):
-    if x is None:
+    # None and NaN (what pandas leaves in empty CSV cells) become ""
+    if x is None or (isinstance(x, float) and x != x):
         return ""
-    try:
-        import pandas as pd
-        if isinstance(x, float) and pd.isna(x):
-            return ""
-    except Exception:
-        pass
     return str(x)
 
+SECTION_ALIASES = {"experience": "professional_experience", "certification": "certifications", "project": "projects"}
+
+def bullet_lines(items):
+    if isinstance(items, str):
+        items = [items]
+    lines = []
+    for item in items or []:
+        line = safe_str(item).strip()
+        if line:
+            lines.append(line if line.startswith("•") else f"• {line}")
+    return lines
+
+def with_bullets(header, items):
+    lines = bullet_lines(items)
+    return (header + "\n" + "\n".join(lines) if lines else header).strip()
+
+def format_job(job):
+    dates = job.get("dates", [])
+    dates = " ".join(dates) if isinstance(dates, list) else safe_str(dates)
+    header = "**{} | {} | {}**".format(safe_str(job.get("title", "")), safe_str(job.get("company", "")), dates)
+    return with_bullets(header, job.get("responsibilities") or [])
+
+def format_project(proj):
+    return with_bullets("**{}**".format(safe_str(proj.get("title", ""))), proj.get("description", []))
+
+def format_certification(cert):
+    return f"{safe_str(cert.get('name', ''))} | {safe_str(cert.get('date', ''))}".strip(" |")
+
+def format_education(edu):
+    degree = safe_str(edu.get("degree", "")) or safe_str(edu.get("title", ""))
+    header = "**{} | {} | {}**".format(degree, safe_str(edu.get("school", "")), safe_str(edu.get("date", ""))).strip(" |")
+    return with_bullets(header, edu.get("highlights", []))
+
+# Sections whose LLM output may be one or more structured entries, as
+# section -> (subsection prefix, entry built from a plain-string block, formatter)
+ENTRY_RULES = {
+    "professional_experience": (
+        "job", lambda sub, text: {"title": sub, "company": "", "dates": "", "responsibilities": [text]}, format_job
+    ),
+    "projects": ("proj", lambda sub, text: {"title": sub, "description": [text]}, format_project),
+    "certifications": ("cert", lambda sub, text: {"name": text}, format_certification),
+    "education": (
+        "edu", lambda sub, text: {"degree": sub, "school": "", "date": "", "highlights": [text]}, format_education
+    ),
+}
+# Flat CSV rows in these sections arrive already formatted as "**Header**\n• bullet"
+PREFORMATTED_SECTIONS = ("professional_experience", "projects", "education")
+
+def block_entries(subsection, content, from_text):
+    for value in (subsection, content):
+        if isinstance(value, list):
+            return value
+    for value in (subsection, content):
+        if isinstance(value, dict):
+            return [value]
+    if content and isinstance(content, str):
+        return [from_text(subsection, content)]
+    return []
+
 def normalize_ollama_blocks(raw_blocks):
     flat_blocks = []
     for block in raw_blocks:
         section = safe_str(block.get("section", "")).strip().lower()
+        section = SECTION_ALIASES.get(section, section)
         subsection = block.get("subsection")
         content = block.get("content")
 
-        if section == "experience":
-            section = "professional_experience"
-        elif section == "certification":
-            section = "certifications"
-        elif section == "project":
-            section = "projects"
-
-        if section == "professional_experience":
-            entries = []
-            if isinstance(subsection, list):
-                entries = subsection
-            elif isinstance(content, list):
-                entries = content
-            elif isinstance(subsection, dict):
-                entries = [subsection]
-            elif isinstance(content, dict):
-                entries = [content]
-            else:
-                if content and isinstance(content, str):
-                    entries = [{"title": subsection, "company": "", "dates": "", "responsibilities": [content]}]
-            for i, job in enumerate(entries):
-                header = "**{} | {} | {}**".format(
-                    safe_str(job.get("title", "")),
-                    safe_str(job.get("company", "")),
-                    " ".join(job.get("dates", [])) if isinstance(job.get("dates"), list) else safe_str(job.get("dates", ""))
-                )
-                bullets = job.get("responsibilities") or []
-                if isinstance(bullets, str): bullets = [bullets]
-                content_str = header
-                if bullets:
-                    content_str += "\n" + "\n".join(
-                        f"• {safe_str(b).strip()}" if not safe_str(b).strip().startswith("•") else safe_str(b).strip() for b in bullets if safe_str(b).strip()
-                    )
-                flat_blocks.append({
-                    "section": "professional_experience",
-                    "subsection": f"job_{i+1}",
-                    "content": safe_str(content_str.strip())
-                })
-
-        elif section == "projects":
-            entries = []
-            if isinstance(subsection, list):
-                entries = subsection
-            elif isinstance(content, list):
-                entries = content
-            elif isinstance(subsection, dict):
-                entries = [subsection]
-            elif isinstance(content, dict):
-                entries = [content]
-            else:
-                if content and isinstance(content, str):
-                    entries = [{"title": subsection, "description": [content]}]
-            for i, proj in enumerate(entries):
-                header = "**{}**".format(safe_str(proj.get("title", "")))
-                desc = proj.get("description", [])
-                if isinstance(desc, str): desc = [desc]
-                content_str = header
-                if desc:
-                    content_str += "\n" + "\n".join(
-                        f"• {safe_str(d).strip()}" if not safe_str(d).strip().startswith("•") else safe_str(d).strip() for d in desc if safe_str(d).strip()
-                    )
-                flat_blocks.append({
-                    "section": "projects",
-                    "subsection": f"proj_{i+1}",
-                    "content": safe_str(content_str.strip())
-                })
-
-        elif section == "certifications":
-            entries = []
-            if isinstance(subsection, list):
-                entries = subsection
-            elif isinstance(content, list):
-                entries = content
-            elif isinstance(subsection, dict):
-                entries = [subsection]
-            elif isinstance(content, dict):
-                entries = [content]
-            else:
-                if content and isinstance(content, str):
-                    entries = [{"name": content}]
-            for i, cert in enumerate(entries):
-                name = safe_str(cert.get("name", ""))
-                date = safe_str(cert.get("date", ""))
-                content_str = f"{name} | {date}".strip(" |")
-                flat_blocks.append({
-                    "section": "certifications",
-                    "subsection": f"cert_{i+1}",
-                    "content": safe_str(content_str)
-                })
-
-        elif section == "education":
-            entries = []
-            if isinstance(subsection, list):
-                entries = subsection
-            elif isinstance(content, list):
-                entries = content
-            elif isinstance(subsection, dict):
-                entries = [subsection]
-            elif isinstance(content, dict):
-                entries = [content]
-            else:
-                if content and isinstance(content, str):
-                    entries = [{"degree": subsection, "school": "", "date": "", "highlights": [content]}]
-            for i, edu in enumerate(entries):
-                degree = safe_str(edu.get("degree", "")) or safe_str(edu.get("title", ""))
-                school = safe_str(edu.get("school", ""))
-                date = safe_str(edu.get("date", ""))
-                highlights = edu.get("highlights", [])
-                if isinstance(highlights, str):
-                    highlights = [highlights]
-                header = "**{} | {} | {}**".format(degree, school, date).strip(" |")
-                content_str = header
-                if highlights:
-                    content_str += "\n" + "\n".join(
-                        f"• {safe_str(h).strip()}" if not safe_str(h).strip().startswith("•") else safe_str(h).strip() for h in highlights if safe_str(h).strip()
-                    )
-                flat_blocks.append({
-                    "section": "education",
-                    "subsection": f"edu_{i+1}",
-                    "content": safe_str(content_str.strip())
-                })
-
+        if section in PREFORMATTED_SECTIONS and isinstance(content, str) and content.strip().startswith("**"):
+            flat_blocks.append({"section": section, "subsection": safe_str(subsection), "content": content.strip()})
+        elif section in ENTRY_RULES:
+            prefix, from_text, formatter = ENTRY_RULES[section]
+            for i, entry in enumerate(block_entries(subsection, content, from_text)):
+                flat_blocks.append({"section": section, "subsection": f"{prefix}_{i+1}", "content": formatter(entry)})
         elif section == "technical_skills":
             if isinstance(content, list):
-                pipe = " | ".join([safe_str(x).strip() for x in content if safe_str(x).strip()])
-                flat_blocks.append({
-                    "section": "technical_skills",
-                    "subsection": safe_str(subsection),
-                    "content": safe_str(pipe)
-                })
+                content = " | ".join(s for s in (safe_str(x).strip() for x in content) if s)
             else:
-                flat_blocks.append({
-                    "section": "technical_skills",
-                    "subsection": safe_str(subsection),
-                    "content": safe_str(content).strip() if content else ""
-                })
-
-        else:
-            if subsection and isinstance(subsection, str):
-                flat_blocks.append({
-                    "section": safe_str(section),
-                    "subsection": safe_str(subsection),
-                    "content": safe_str(content).strip() if content else ""
-                })
+                content = safe_str(content).strip() if content else ""
+            flat_blocks.append({"section": section, "subsection": safe_str(subsection), "content": content})
+        elif subsection and isinstance(subsection, str):
+            flat_blocks.append({
+                "section": section,
+                "subsection": subsection,
+                "content": safe_str(content).strip() if content else ""
+            })
     return flat_blocks
 
-def enforce_all_guidelines(normalized_blocks, master_blocks):
-    def block_dict(blocks):
-        return {(safe_str(b.get("section", "")), safe_str(b.get("subsection", ""))): safe_str(b.get("content", "")) for b in blocks}
-
-    master_lookup = block_dict(master_blocks)
-    llm_lookup = block_dict(normalized_blocks)
-
-    personal_info_order = ["name", "location", "email", "phone", "linkedin", "github", "portfolio", "target_roles"]
-    personal_info_blocks = []
-    for sub in personal_info_order:
-        if sub == "target_roles" and ("personal_info", "target_roles") in llm_lookup:
-            content = safe_str(llm_lookup[("personal_info", "target_roles")])
-        else:
-            content = safe_str(master_lookup.get(("personal_info", sub), ""))
-        personal_info_blocks.append({
-            "section": "personal_info",
-            "subsection": sub,
-            "content": content
-        })
-
-    summary = safe_str(llm_lookup.get(("professional_summary", "summary"), master_lookup.get(("professional_summary", "summary"), "")))
-    summary_block = [{"section": "professional_summary", "subsection": "summary", "content": summary}]
-
-    skill_subsections = ["programming_languages", "libraries_frameworks", "tools_platforms", "other_skills"]
-    skill_blocks = []
-    for sub in skill_subsections:
-        content = safe_str(llm_lookup.get(("technical_skills", sub), master_lookup.get(("technical_skills", sub), "")))
-        skill_blocks.append({"section": "technical_skills", "subsection": sub, "content": content})
-
-    llm_jobs = [b for b in normalized_blocks if b["section"] == "professional_experience"]
-    master_jobs = [b for b in master_blocks if b["section"] == "professional_experience"]
-    jobs = []
-    idx = 0
-    for b in llm_jobs + master_jobs:
-        if idx >= 3:
+PERSONAL_INFO_FIELDS = ("name", "location", "email", "phone", "linkedin", "github", "portfolio", "target_roles")
+SKILL_FIELDS = ("programming_languages", "libraries_frameworks", "tools_platforms", "other_skills")
+
+# One rule per output section, in output order:
+# - "fields": fixed subsections, each taken from the LLM output if it has it (only the ones in
+#   "llm_fields" when given) and from the master resume otherwise
+# - "merge": LLM blocks then master blocks, renumbered "<prefix>_N", cut to "limit" and padded to
+#   "bullets"[N] lines; "keep_empty" counts blank blocks and "fill" adds blank rows up to "limit"
+# - neither: the first "limit" non-blank blocks from the LLM output, or from the master resume if the LLM had none
+GUIDELINE_RULES = (
+    {"section": "personal_info", "fields": PERSONAL_INFO_FIELDS, "llm_fields": ("target_roles",)},
+    {"section": "professional_summary", "fields": ("summary",)},
+    {"section": "technical_skills", "fields": SKILL_FIELDS},
+    {
+        "section": "professional_experience", "merge": True, "prefix": "job", "limit": 3, "bullets": (4, 4, 2),
+        "keep_empty": True, "fill": True
+    },
+    {"section": "education", "prefix": "edu", "limit": 1},
+    {"section": "certifications", "prefix": "cert", "limit": 3},
+    {"section": "projects", "merge": True, "prefix": "proj", "limit": 4, "bullets": (2, 2, 2, 2)},
+)
+MAX_OUTPUT_ROWS = 42
+BLOCK_KEYS = {"section", "subsection", "content"}
+
+def bucket_blocks(blocks):
+    # One pass: (section, subsection) -> content (last one wins) and section -> [(content, block)] in order
+    lookup, buckets = {}, {}
+    for b in blocks:
+        section = safe_str(b.get("section", ""))
+        content = safe_str(b.get("content", ""))
+        lookup[(section, safe_str(b.get("subsection", "")))] = content
+        buckets.setdefault(section, []).append((content, b))
+    return lookup, buckets
+
+def merge_section_blocks(rule, candidates):
+    out, seen = [], set()
+    for content, b in candidates:
+        if len(out) >= rule["limit"]:
             break
-        if b in jobs:
+        lines = [l for l in content.split("\n") if l.strip()]
+        if rule.get("keep_empty"):
+            # Skip a block that is identical to a row already produced (e.g. the LLM echoed job_1 back)
+            if b.keys() == BLOCK_KEYS and (b["section"], b["subsection"], b["content"]) in seen:
+                continue
+        elif not lines:
             continue
-        lines = [safe_str(l) for l in safe_str(b.get("content", "")).split("\n") if safe_str(l).strip()]
         header = lines[0] if lines else ""
-        bullets = lines[1:]
-        if idx in [0, 1]:
-            bullets = pad_bullets(bullets, 4)
-        else:
-            bullets = pad_bullets(bullets, 2)
-        jobs.append({
-            "section": "professional_experience",
-            "subsection": f"job_{idx+1}",
-            "content": "\n".join([header] + bullets)
-        })
-        idx += 1
-    while len(jobs) < 3:
-        jobs.append({
-            "section": "professional_experience",
-            "subsection": f"job_{len(jobs)+1}",
-            "content": ""
-        })
-
-    # Education: include only if present in LLM or master and has content
-    llm_edus = [b for b in normalized_blocks if b["section"] == "education" and safe_str(b.get("content", "")).strip()]
-    master_edus = [b for b in master_blocks if b["section"] == "education" and safe_str(b.get("content", "")).strip()]
-    edu_blocks = []
-    if llm_edus:
-        edu = llm_edus[0]
-        edu_blocks.append({
-            "section": "education",
-            "subsection": safe_str(edu.get("subsection", "edu_1")),
-            "content": safe_str(edu.get("content", ""))
-        })
-    elif master_edus:
-        edu = master_edus[0]
-        edu_blocks.append({
-            "section": "education",
-            "subsection": safe_str(edu.get("subsection", "edu_1")),
-            "content": safe_str(edu.get("content", ""))
-        })
-    # else: skip edu_blocks (no blank row!)
-
-    # Certifications: same logic as education
-    llm_certs = [b for b in normalized_blocks if b["section"] == "certifications" and safe_str(b.get("content", "")).strip()]
-    master_certs = [b for b in master_blocks if b["section"] == "certifications" and safe_str(b.get("content", "")).strip()]
-    cert_blocks = []
-    for b in (llm_certs or master_certs)[:3]:
-        cert_blocks.append({
-            "section": "certifications",
-            "subsection": safe_str(b.get("subsection", f"cert_{len(cert_blocks)+1}")),
-            "content": safe_str(b.get("content", ""))
-        })
-    # (if neither LLM nor master has any, cert_blocks will be blank—no output)
-
-    # Projects: same logic, only if content
-    llm_projects = [b for b in normalized_blocks if b["section"] == "projects" and safe_str(b.get("content", "")).strip()]
-    master_projects = [b for b in master_blocks if b["section"] == "projects" and safe_str(b.get("content", "")).strip()]
-    proj_blocks = []
-    idx = 0
-    for b in llm_projects + master_projects:
-        if idx >= 4:
-            break
-        lines = [safe_str(l) for l in safe_str(b.get("content", "")).split("\n") if safe_str(l).strip()]
-        if not lines:
-            continue
-        header = lines[0]
-        bullets = pad_bullets(lines[1:], 2)
-        proj_blocks.append({
-            "section": "projects",
-            "subsection": f"proj_{idx+1}",
-            "content": "\n".join([header] + bullets)
-        })
-        idx += 1
-
-    output_blocks = (
-        personal_info_blocks +
-        summary_block +
-        skill_blocks +
-        jobs +
-        edu_blocks +
-        cert_blocks +
-        proj_blocks
-    )
-
-    # Remove duplicate target_roles, ensure all fields are string, skip trailing blanks
-    target_roles_found = False
-    final_blocks = []
-    for b in output_blocks:
-        s = safe_str(b.get("section", ""))
-        sub = safe_str(b.get("subsection", ""))
-        c = safe_str(b.get("content", ""))
-        if s == "personal_info" and sub == "target_roles":
-            if target_roles_found:
-                continue
-            target_roles_found = True
-        # Do NOT output any section with all blank fields (removes extra trailing blanks)
-        if not (s == "" and sub == "" and c == ""):
-            final_blocks.append({"section": s, "subsection": sub, "content": c})
+        row = {
+            "section": rule["section"],
+            "subsection": f"{rule['prefix']}_{len(out)+1}",
+            "content": "\n".join([header] + pad_bullets(lines[1:], rule["bullets"][len(out)]))
+        }
+        seen.add((row["section"], row["subsection"], row["content"]))
+        out.append(row)
+    if rule.get("fill"):
+        out.extend(
+            {"section": rule["section"], "subsection": f"{rule['prefix']}_{i+1}", "content": ""}
+            for i in range(len(out), rule["limit"])
+        )
+    return out
 
-    # Limit to 42 rows (truncate or just output fewer)
-    return final_blocks[:42]
+def enforce_all_guidelines(normalized_blocks, master_blocks):
+    llm_lookup, llm_buckets = bucket_blocks(normalized_blocks)
+    master_lookup, master_buckets = bucket_blocks(master_blocks)
+
+    output_blocks = []
+    for rule in GUIDELINE_RULES:
+        section = rule["section"]
+        if "fields" in rule:
+            llm_fields = rule.get("llm_fields", rule["fields"])
+            for sub in rule["fields"]:
+                key = (section, sub)
+                content = llm_lookup[key] if sub in llm_fields and key in llm_lookup else master_lookup.get(key, "")
+                output_blocks.append({"section": section, "subsection": sub, "content": content})
+        elif rule.get("merge"):
+            candidates = llm_buckets.get(section, []) + master_buckets.get(section, [])
+            if not rule.get("keep_empty"):
+                candidates = [c for c in candidates if c[0].strip()]
+            output_blocks.extend(merge_section_blocks(rule, candidates))
+        else:
+            llm = [c for c in llm_buckets.get(section, []) if c[0].strip()]
+            chosen = llm or [c for c in master_buckets.get(section, []) if c[0].strip()]
+            for i, (content, b) in enumerate(chosen[:rule["limit"]]):
+                output_blocks.append({
+                    "section": section,
+                    "subsection": safe_str(b.get("subsection", f"{rule['prefix']}_{i+1}")),
+                    "content": content
+                })
+    return output_blocks[:MAX_OUTPUT_ROWS]
 
 def parse_and_sanitize_output(raw_response, master_blocks):
+    # Accepts JSON or CSV output and keeps every complete block, even from truncated or noisy text
     try:
-        start = raw_response.find("[")
-        end = raw_response.rfind("]") + 1
-        clean_json = raw_response[start:end].strip()
-        parsed = json.loads(clean_json)
+        parsed = parse_llm_output(raw_response)
+        if not parsed:
+            raise ValueError("No resume blocks found in LLM output")
         normalized = normalize_ollama_blocks(parsed)
         return enforce_all_guidelines(normalized, master_blocks)
     except Exception as e:
         return [{"section": "error", "subsection": "parse_fail", "content": safe_str(e)}]
 
-def full_resume_rewriter(job_description, resume_rows):
-    resume_blocks = format_resume_rows(resume_rows)
-    resume_str = json.dumps(resume_blocks, indent=2)
+def missing_sections(normalized_blocks, master_blocks):
+    # Required sections the master resume has but the LLM output does not
+    present = {b["section"] for b in normalized_blocks if safe_str(b.get("content")).strip()}
+    available = {b["section"] for b in master_blocks}
+    return [s for s in REQUIRED_SECTIONS if s in available and s not in present]
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def serialize_blocks(blocks):
+    # Same section,subsection,content CSV the model is asked to answer in, without JSON indentation
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for b in blocks:
+        writer.writerow([b["section"], b["subsection"], b["content"]])
+    return buf.getvalue().strip()
+
+def trim_block(block, token_budget):
+    # block itself if it fits in token_budget, else a copy with the leading lines that fit, or None
+    if estimate_tokens(serialize_blocks([block])) <= token_budget:
+        return block
+    lines = [line for line in safe_str(block["content"]).split("\n") if line.strip()]
+    while lines:
+        lines.pop()
+        trimmed = dict(block, content="\n".join(lines))
+        if lines and estimate_tokens(serialize_blocks([trimmed])) <= token_budget:
+            return trimmed
+    return None
+
+def select_relevant_blocks(job_description, resume_blocks, token_budget=PROMPT_RESUME_TOKEN_BUDGET):
+    from utils.job_ranker import similarity_scores
+
+    # Contact details are re-injected from the master resume by enforce_all_guidelines, so only target_roles is sent
+    fixed, ranked = [], []
+    for i, b in enumerate(resume_blocks):
+        if b["section"] in RANKED_MINIMUMS:
+            ranked.append(i)
+        elif b["section"] != "personal_info" or b["subsection"] == "target_roles":
+            fixed.append(i)
+
+    # Fixed sections go first but count against the budget too; a block that would overrun it keeps
+    # only its leading lines, and a block with no room left is dropped
+    blocks = list(resume_blocks)
+    used = 0
+    kept = set()
+    for i in fixed:
+        block = trim_block(blocks[i], token_budget - used)
+        if block is not blocks[i]:
+            print(f"Prompt budget: trimmed {blocks[i]['section']}/{blocks[i]['subsection']} to fit {token_budget} tokens")
+        if block is None:
+            continue
+        blocks[i] = block
+        kept.add(i)
+        used += estimate_tokens(serialize_blocks([block]))
+
+    scores = similarity_scores(job_description, [blocks[i]["content"] for i in ranked])
+    by_score = sorted(zip(scores, ranked), key=lambda pair: -pair[0])
+    counts = {}
+
+    def keep(i):
+        nonlocal used
+        cost = estimate_tokens(serialize_blocks([blocks[i]]))
+        if used + cost > token_budget:
+            return
+        kept.add(i)
+        counts[blocks[i]["section"]] = counts.get(blocks[i]["section"], 0) + 1
+        used += cost
+
+    # First the best blocks needed for the output's job/project counts (experience first), then
+    # any other block relevant enough to be worth its tokens
+    for section, minimum in RANKED_MINIMUMS.items():
+        for score, i in by_score:
+            if blocks[i]["section"] == section and counts.get(section, 0) < minimum:
+                keep(i)
+    for score, i in by_score:
+        if i not in kept and score >= MIN_BLOCK_RELEVANCE:
+            keep(i)
+
+    # Original resume order keeps jobs chronological
+    return [b for i, b in enumerate(blocks) if i in kept]
+
+def build_rewrite_prompt(job_description, resume_blocks):
+    job_description = safe_str(job_description).strip()[:PROMPT_JOB_TOKEN_BUDGET * CHARS_PER_TOKEN]
+    resume_str = serialize_blocks(select_relevant_blocks(job_description, resume_blocks))
 
     # Privacy-safe generic sample output (not your real info!)
     generic_example = """
@@ -404,11 +411,160 @@ Here is an example of the required output format (values are placeholders):
 Job Description:
 {job_description}
 
-Master Resume:
+Master Resume (CSV: section,subsection,content):
 {resume_str}
 """.strip()
+    return prompt
+
+SECTION_PROMPT = """
+You are an expert resume editor. Rewrite the resume blocks below so they match the job description,
+using the job description's language and requirements. {instructions}
+Do NOT invent employers, dates, degrees or projects that are not in the blocks.
+Respond with a JSON array only (no commentary, no markdown), shaped like this example:
 
-    response = run_ollama(prompt)
+{example}
+
+Job Description:
+{job_description}
+
+Resume blocks (CSV: section,subsection,content):
+{blocks}
+""".strip()
+
+def parse_block_header(content):
+    # "**Title | Company | Dates**" -> ["Title", "Company", "Dates"]
+    lines = [l for l in safe_str(content).split("\n") if l.strip()]
+    header = lines[0].replace("**", "").strip() if lines else ""
+    return [p.strip() for p in header.split("|")]
+
+def build_section_prompts(job_description, resume_blocks):
+    # Independent prompts whose JSON answers normalize_ollama_blocks understands, in output order
+    job_description = safe_str(job_description).strip()[:PROMPT_JOB_TOKEN_BUDGET * CHARS_PER_TOKEN]
+    selected = select_relevant_blocks(job_description, resume_blocks)
+    by_section = {}
+    for b in selected:
+        by_section.setdefault(b["section"], []).append(b)
+
+    def prompt(instructions, example, blocks):
+        return SECTION_PROMPT.format(
+            instructions=instructions,
+            example=json.dumps(example),
+            job_description=job_description,
+            blocks=serialize_blocks(blocks),
+        )
+
+    prompts = []
+    summary_blocks = by_section.get("professional_summary", []) + [
+        b for b in by_section.get("personal_info", []) if b["subsection"] == "target_roles"
+    ]
+    if summary_blocks:
+        prompts.append(("summary", prompt(
+            "Write a 2-3 sentence professional summary and a pipe-separated list of target roles.",
+            [
+                {"section": "professional_summary", "subsection": "summary", "content": "[2-3 sentences]"},
+                {"section": "personal_info", "subsection": "target_roles", "content": "[Role] | [Role]"},
+            ],
+            summary_blocks,
+        ), None))
+
+    skills = by_section.get("technical_skills", [])
+    if skills:
+        prompts.append(("skills", prompt(
+            "Keep the same subsections; reorder and trim each skill list so the job's skills come first.",
+            [{"section": "technical_skills", "subsection": skills[0]["subsection"], "content": ["Skill", "Skill"]}],
+            skills,
+        ), None))
+
+    for i, job in enumerate(by_section.get("professional_experience", [])[:3]):
+        title, company, dates = (parse_block_header(job["content"]) + ["", "", ""])[:3]
+        bullets = 4 if i < 2 else 2
+        prompts.append((f"job_{i+1}", prompt(
+            f"Rewrite this one job with exactly {bullets} bullets. Keep the title, company and dates.",
+            [{"section": "professional_experience", "subsection": {
+                "title": title, "company": company, "dates": dates, "responsibilities": ["[Bullet]"] * bullets
+            }}],
+            [job],
+        ), job))
+
+    projects = by_section.get("projects", [])
+    if projects:
+        prompts.append(("projects", prompt(
+            "Select the 4 most relevant projects and rewrite each with exactly 2 bullets.",
+            [{"section": "projects", "subsection": {"title": "[Project Name]", "description": ["[Bullet]", "[Bullet]"]}}],
+            projects,
+        ), None))
+    return prompts
+
+def rewrite_section(name, prompt, retries=SECTION_RETRIES):
+    last_error = None
+    for _ in range(retries + 1):
+        try:
+            blocks = normalize_ollama_blocks(parse_llm_output(run_ollama(prompt)))
+            if blocks:
+                return blocks
+            last_error = "no blocks in response"
+        except Exception as e:
+            last_error = e
+    raise RuntimeError(f"{name}: {last_error}")
+
+def rewrite_sections(job_description, resume_blocks, sections=None, max_workers=SECTION_WORKERS, retries=SECTION_RETRIES):
+    # Each section is generated by its own prompt, concurrently, and retried on its own; sections
+    # limits the run to those resume sections. A job whose prompt still fails keeps its master
+    # wording in its slot; other failed sections fall back to the master resume in enforce_all_guidelines.
+    prompts = build_section_prompts(job_description, resume_blocks)
+    if sections is not None:
+        prompts = [p for p in prompts if SECTION_PROMPT_SECTIONS.get(p[0], "professional_experience") in sections]
+    results, failed = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [(name, fallback, pool.submit(rewrite_section, name, prompt, retries)) for name, prompt, fallback in prompts]
+        for name, fallback, future in futures:
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failed[name] = str(e)
+                if fallback is not None:
+                    results[name] = [fallback]
+
+    return [b for name, _, _ in prompts for b in results.get(name, [])], failed
+
+def sectioned_resume_rewriter(job_description, resume_blocks, max_workers=SECTION_WORKERS, retries=SECTION_RETRIES):
+    merged, failed = rewrite_sections(job_description, resume_blocks, max_workers=max_workers, retries=retries)
+    return enforce_all_guidelines(merged, resume_blocks), failed
+
+def full_resume_rewriter(job_description, resume_rows, on_token=None, force_regenerate=False, mode=None):
+    mode = mode or REWRITE_MODE
+    resume_blocks = format_resume_rows(resume_rows)
+    cache = get_rewrite_cache()
+    cache_key = rewrite_cache_key(job_description, resume_blocks, mode)
+    if not force_regenerate:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {"rewritten_blocks": cached, "cached": True}
+
+    if mode == "sectioned":
+        parsed_blocks, failed = sectioned_resume_rewriter(job_description, resume_blocks)
+        if not failed:
+            cache.set(cache_key, parsed_blocks)
+        return {"rewritten_blocks": parsed_blocks, "cached": False, "failed_sections": failed}
+
+    # Blocks are parsed while tokens stream in, so a dropped stream still keeps what was generated
+    prompt = build_rewrite_prompt(job_description, resume_blocks)
+    parser = ResumeOutputParser()
+
+    def feed(token):
+        parser.feed(token)
+        if on_token:
+            on_token(token)
+
+    try:
+        response = run_ollama(prompt, on_token=feed)
+    except Exception:
+        if not parser.blocks:
+            raise
+        response = parser.text
+    if not parser.text:
+        parser.feed(response)
+    parser.close()
 
     with open("ollama_raw_output.txt", "w", encoding="utf-8") as f:
         f.write(response)
@@ -417,5 +573,18 @@ Master Resume:
     print(response)
     print("=== RAW OLLAMA RESPONSE END ===")
 
-    parsed_blocks = parse_and_sanitize_output(response, resume_blocks)
-    return {"rewritten_blocks": parsed_blocks}
\ No newline at end of file
+    # Only the sections the output is missing are regenerated, one prompt each
+    normalized = normalize_ollama_blocks(parser.blocks)
+    regenerated = missing_sections(normalized, resume_blocks)
+    failed = {}
+    if regenerated:
+        extra, failed = rewrite_sections(job_description, resume_blocks, sections=regenerated)
+        normalized += extra
+
+    if not normalized:
+        parsed_blocks = [{"section": "error", "subsection": "parse_fail", "content": "No resume blocks found in LLM output"}]
+    else:
+        parsed_blocks = enforce_all_guidelines(normalized, resume_blocks)
+        if not failed:
+            cache.set(cache_key, parsed_blocks)
+    return {"rewritten_blocks": parsed_blocks, "cached": False, "regenerated_sections": regenerated, "failed_sections": failed}
@@ -0,0 +1,116 @@
+# utils/ttl_cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    # In-memory LRU with optional expiry; pass a path to back it with SQLite so entries survive restarts.
+    # Values must be JSON-serializable when a path is given.
+    def __init__(self, max_entries=256, ttl=None, path=None, clock=time.time):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.path = path
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, last_used REAL)"
+            )
+            self._db.commit()
+
+    def _expires_at(self):
+        return self.clock() + self.ttl if self.ttl else None
+
+    def _expired(self, expires_at):
+        return expires_at is not None and expires_at <= self.clock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if not self._expired(expires_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    value = json.loads(row[0])
+                    self._db.execute("UPDATE cache SET last_used = ? WHERE key = ?", (self.clock(), key))
+                    self._db.commit()
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+                if row is not None:
+                    self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            expires_at = self._expires_at()
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), expires_at, self.clock()),
+                )
+                # Keep the disk copy within the same bound, dropping least recently used rows
+                self._db.execute(
+                    "DELETE FROM cache WHERE key NOT IN (SELECT key FROM cache ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "persistent": self._db is not None,
+        }